@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+
+import argparse
+import json
+import sys
+import time
+
+import geo
+import geoutil
+import paper
+
+AXIOMS = {
+    'O1': geoutil.huzita_justin.O1,
+    'O2': geoutil.huzita_justin.O2,
+    'O3': geoutil.huzita_justin.O3,
+    'O4': geoutil.huzita_justin.O4,
+    'O5': geoutil.huzita_justin.O5,
+    'O6': geoutil.huzita_justin.O6,
+    'O7': geoutil.huzita_justin.O7,
+}
+
+UNIT_SQUARE = [[0, 0], [0, 1], [1, 1], [1, 0]]
+
+class Model(object):
+    def __init__(self, name, polygon, lines):
+        self.name = name
+        self.polygon = polygon
+        self.lines = lines
+
+    def __repr__(self):
+        return 'batch.Model(%s)' % self.name
+
+def parse_point(value):
+    (x, y) = value
+    return geo.Point(float(x), float(y))
+
+def parse_line(value):
+    (x, y, offset) = value
+    return geo.Line(geo.Vector(float(x), float(y)), float(offset))
+
+def parse_fold(step):
+    if 'line' in step:
+        line = parse_line(step['line'])
+    else:
+        name = step.get('axiom')
+        if name not in AXIOMS:
+            raise ValueError('unknown axiom %r' % name)
+        points = [parse_point(point) for point in step.get('points', [])]
+        lines = [parse_line(line) for line in step.get('lines', [])]
+        result = AXIOMS[name](*(points + lines))
+        if result is None:
+            result = []
+        elif isinstance(result, geo.Line):
+            result = [result]
+        choice = step.get('choice', 0)
+        if choice >= len(result):
+            raise ValueError('%s has no solution %s' % (name, choice))
+        line = result[choice]
+
+    if step.get('reverse'):
+        line = geo.Line(-line.normal, -line.offset)
+    return line
+
+def parse_model(value, name):
+    points = [parse_point(point) for point in value.get('paper', UNIT_SQUARE)]
+    lines = [parse_fold(step) for step in value['folds']]
+    return Model(value.get('name', name), geo.Polygon(points), lines)
+
+def load_models(path):
+    with open(path) as f:
+        value = json.load(f)
+    if isinstance(value, dict):
+        value = [value]
+    models = []
+    idx = 0
+    for model in value:
+        models.append(parse_model(model, '%s:%s' % (path, idx)))
+        idx += 1
+    return models
+
+def run_model(model, profile=None):
+    sheet = paper.Sheet(geo.Polygon(list(model.polygon.points)))
+    sheet.profile = profile
+    start = time.perf_counter()
+    sheet.fold_many(model.lines)
+    elapsed = time.perf_counter() - start
+    return (sheet, elapsed, sheet.pruned_facets)
+
+def num_facets(sheet):
+    return sum(len(layer.facets) for layer in sheet.layers)
+
+def folds_per_second(folds, elapsed):
+    return folds / elapsed if elapsed > 0 else float('inf')
+
+def print_profile(profile):
+    times = {}
+    for stats in profile:
+        for (phase, elapsed) in stats.times.items():
+            times[phase] = times.get(phase, 0) + elapsed
+    for (phase, elapsed) in times.items():
+        print(' %s: %.3f ms' % (phase, elapsed * 1000 / len(profile)))
+    print(' per fold: %.1f visited, %.1f split, %.1f layers created' % (
+        sum(stats.facets_visited for stats in profile) / len(profile),
+        sum(stats.facets_split for stats in profile) / len(profile),
+        sum(stats.layers_created for stats in profile) / len(profile)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply fold sequences to sheets without a display.')
+    parser.add_argument('files', nargs='+', help='JSON model files')
+    parser.add_argument('--facets', action='store_true', help='print the final facets of every model')
+    parser.add_argument('--repeat', type=int, default=1, help='number of times to replay each model')
+    parser.add_argument('--profile', action='store_true', help='print the average time spent in each fold phase')
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    ret = 0
+    total_folds = 0
+    total_elapsed = 0
+    for path in args.files:
+        try:
+            models = load_models(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print('%s: %s' % (path, e), file=sys.stderr)
+            ret = 1
+            continue
+
+        for model in models:
+            elapsed = 0
+            profile = [] if args.profile else None
+            for _ in range(args.repeat):
+                (sheet, run_elapsed, pruned) = run_model(model, profile.append if args.profile else None)
+                elapsed += run_elapsed
+            elapsed /= args.repeat
+            total_folds += len(model.lines) * args.repeat
+            total_elapsed += elapsed * args.repeat
+
+            print('%s: %d folds, %d layers, %d facets, %d pruned, %.3f ms, %.1f folds/s' % (
+                model.name, len(model.lines), len(sheet.layers), num_facets(sheet), pruned,
+                elapsed * 1000, folds_per_second(len(model.lines), elapsed)))
+            if profile:
+                print_profile(profile)
+            if args.facets:
+                print(sheet)
+
+    print('total: %d folds, %.3f s, %.1f folds/s' % (
+        total_folds, total_elapsed, folds_per_second(total_folds, total_elapsed)))
+    return ret
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+import os
+
+from . import fold
+from . import pattern
+from . import snapshot
+from . import svg
+
+def load(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.fold':
+        return fold.load(path)
+    if extension == '.svg':
+        return svg.load(path)
+    return snapshot.load(path)
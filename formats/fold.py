@@ -0,0 +1,291 @@
+import collections
+import json
+import math
+import re
+
+import geo
+import geoutil
+
+from . import pattern
+
+CREATOR = 'origami'
+CHUNK_SIZE = 1 << 16
+NUMBER_END = re.compile(r'[\s,\]}]')
+# Corners are snapped in both the crease pattern and the folded form.
+FIT_DISTANCE = 4 * geoutil.polygon.MIN_DISTANCE
+
+def corners(sheet):
+    for facet in sheet.facets():
+        yield zip(sheet.paper_polygon(facet).points, facet.polygon.points)
+
+def vertices(sheet, table, folded):
+    for facet_corners in corners(sheet):
+        for (point, folded_point) in facet_corners:
+            if point not in table:
+                table[point] = len(table)
+                vertex = folded_point if folded else point
+                yield [vertex.x, vertex.y]
+
+def faces(sheet, table):
+    for facet in sheet.facets():
+        yield [table[point] for point in sheet.paper_polygon(facet).points]
+
+def edges(sheet, table):
+    half_edges = sheet.edges
+    for (edge, assignment) in sheet.creases():
+        yield [table[half_edges.points[edge]], table[half_edges.points[half_edges.next[edge]]]]
+
+def write_value(f, key, value, indent):
+    f.write(',\n%s"%s": %s' % (indent, key, json.dumps(value)))
+
+def write_list(f, key, values, indent):
+    f.write(',\n%s"%s": [' % (indent, key))
+    separator = '\n'
+    for value in values:
+        f.write('%s%s  %s' % (separator, indent, json.dumps(value)))
+        separator = ',\n'
+    f.write('\n%s]' % indent)
+
+def write(sheet, f):
+    # The file frame holds the crease pattern and a child frame the folded form.
+    table = {}
+    f.write('{\n  "file_spec": 1.1')
+    write_value(f, 'file_creator', CREATOR, '  ')
+    write_value(f, 'file_classes', ['singleModel'], '  ')
+    write_value(f, 'frame_classes', ['creasePattern'], '  ')
+    write_value(f, 'frame_attributes', ['2D'], '  ')
+    write_list(f, 'vertices_coords', vertices(sheet, table, False), '  ')
+    write_list(f, 'faces_vertices', faces(sheet, table), '  ')
+    write_list(f, 'edges_vertices', edges(sheet, table), '  ')
+    write_list(f, 'edges_assignment', (assignment for (_, assignment) in sheet.creases()), '  ')
+    f.write(',\n  "file_frames": [{\n    "frame_classes": ["foldedForm"]')
+    write_value(f, 'frame_parent', 0, '    ')
+    write_value(f, 'frame_inherit', True, '    ')
+    write_list(f, 'vertices_coords', vertices(sheet, {}, True), '    ')
+    write_list(f, '%s:faces_layer' % CREATOR, (facet.layer.depth for facet in sheet.facets()), '    ')
+    f.write('\n  }]\n}\n')
+
+def save(sheet, path):
+    with open(path, 'w') as f:
+        write(sheet, f)
+
+class Reader(object):
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def __repr__(self):
+        return 'formats.fold.Reader(%s)' % self.f
+
+    def fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('FOLD file has %r where one of %r was expected' % (char, chars))
+        self.pos += 1
+        return char
+
+    def value(self):
+        # Only a number can look complete before the chunk that ends it.
+        char = self.peek()
+        if char and char in '-0123456789':
+            while not NUMBER_END.search(self.buffer, self.pos) and self.fill():
+                pass
+        while True:
+            try:
+                (value, end) = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def elements(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.expect(',]') == ']':
+                return
+
+    def members(self):
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def list(self):
+        return [self.value() for _ in self.elements()]
+
+    def skip(self):
+        char = self.peek()
+        if char == '[':
+            for _ in self.elements():
+                self.skip()
+        elif char == '{':
+            for _ in self.members():
+                self.skip()
+        else:
+            self.value()
+
+def read_frame(reader):
+    frame = {}
+    for key in reader.members():
+        if key in ('frame_classes', 'vertices_coords', '%s:faces_layer' % CREATOR):
+            frame[key] = reader.list()
+        else:
+            reader.skip()
+    return frame
+
+def folded_frame(frames):
+    for frame in frames:
+        if ('foldedForm' in frame.get('frame_classes', ()) and 'vertices_coords' in frame and
+                '%s:faces_layer' % CREATOR in frame):
+            return frame
+    return None
+
+def turned_over(facet, folded_polygon):
+    return (geoutil.polygon.signed_area(facet.polygon) > 0) != (geoutil.polygon.signed_area(folded_polygon) > 0)
+
+def face_parities(facets, folded_polygons, half_edges, assignments):
+    # A face turned over in the folded form runs the other way round, but
+    # snapping can flip a sliver, so those take their parity across a crease
+    # from a neighbor instead.
+    parities = {}
+    queue = collections.deque()
+    for (facet, folded_polygon) in zip(facets, folded_polygons):
+        perimeter = sum(segment.length() for segment in folded_polygon.segments())
+        if abs(geoutil.polygon.signed_area(folded_polygon)) > geoutil.polygon.MIN_DISTANCE * perimeter:
+            parities[facet] = 0 if turned_over(facet, folded_polygon) else 1
+            queue.append(facet)
+    while queue:
+        facet = queue.popleft()
+        for edge in half_edges.loop(facet.edge):
+            twin = half_edges.twin[edge]
+            if twin == -1 or half_edges.facet[twin] in parities:
+                continue
+            neighbor_facet = half_edges.facet[twin]
+            assignment = assignments.get((half_edges.points[edge], half_edges.points[half_edges.next[edge]]))
+            if assignment not in ('M', 'V', 'F'):
+                continue
+            parities[neighbor_facet] = parities[facet] if assignment == 'F' else 1 - parities[facet]
+            queue.append(neighbor_facet)
+    idx = 0
+    for (facet, folded_polygon) in zip(facets, folded_polygons):
+        if facet not in parities:
+            if geoutil.polygon.signed_area(folded_polygon) == 0:
+                raise ValueError('face %s has no area in the folded form' % idx)
+            parities[facet] = 0 if turned_over(facet, folded_polygon) else 1
+        idx += 1
+    return [parities[facet] for facet in facets]
+
+def face_transform(facet, folded_polygon, idx):
+    # The rigid motion, turned over for faces of parity 0, that best fits
+    # the corners; both sets of corners are snapped, so none of them is exact.
+    points = facet.polygon.points
+    folded_points = folded_polygon.points
+    center = geoutil.polygon.centroid(facet.polygon)
+    folded_center = geoutil.polygon.centroid(folded_polygon)
+    flip = 1 if facet.parity else -1
+    dot = 0
+    cross = 0
+    for (point, folded_point) in zip(points, folded_points):
+        (x, y) = (point.x - center.x, (point.y - center.y) * flip)
+        (folded_x, folded_y) = (folded_point.x - folded_center.x, folded_point.y - folded_center.y)
+        dot += x * folded_x + y * folded_y
+        cross += x * folded_y - y * folded_x
+    length = math.hypot(dot, cross)
+    (a, b) = (dot / length, cross / length)
+    (c, d) = (-b * flip, a * flip)
+    transform = geo.Transform(a, b, c, d, folded_center.x - a * center.x - c * center.y,
+                              folded_center.y - b * center.x - d * center.y)
+    for (point, folded_point) in zip(points, folded_points):
+        if (geoutil.transform.point(transform, point) - folded_point).magnitude() > FIT_DISTANCE:
+            raise ValueError('face %s is not a flat fold of its crease pattern face' % idx)
+    return transform
+
+def read(f):
+    reader = Reader(f)
+    coords = []
+    faces = None
+    edges = []
+    edge_assignments = []
+    frames = []
+    for key in reader.members():
+        if key == 'vertices_coords':
+            coords = [reader.value()[:2] for _ in reader.elements()]
+        elif key == 'faces_vertices':
+            faces = reader.list()
+        elif key == 'edges_vertices':
+            edges = reader.list()
+        elif key == 'edges_assignment':
+            edge_assignments = reader.list()
+        elif key == 'file_frames':
+            frames = [read_frame(reader) for _ in reader.elements()]
+        else:
+            reader.skip()
+    if reader.peek():
+        raise ValueError('FOLD file has data after the document')
+    if not coords:
+        raise ValueError('FOLD file has no vertices')
+    if not all(isinstance(idx, int) and 0 <= idx < len(coords) for edge in edges for idx in edge):
+        raise ValueError('FOLD file has an edge vertex out of range')
+    if faces is None:
+        points = pattern.normalize(coords)
+        segments = [geo.Segment(points[idx0], points[idx1]) for (idx0, idx1) in edges]
+        return pattern.from_segments(segments)
+
+    frame = folded_frame(frames)
+    if frame is None:
+        return pattern.sheet(*pattern.link_facets(pattern.normalize(coords), faces))
+
+    # Only files written here carry layers, and in sheet coordinates.
+    points = [geo.Point(x, y) for (x, y) in coords]
+    folded_points = [geo.Point(coord[0], coord[1]) for coord in frame['vertices_coords']]
+    depths = frame['%s:faces_layer' % CREATOR]
+    if len(folded_points) != len(points):
+        raise ValueError('FOLD file has %s folded vertices for %s vertices' % (len(folded_points), len(points)))
+    if len(depths) != len(faces):
+        raise ValueError('FOLD file has %s face layers for %s faces' % (len(depths), len(faces)))
+    (facets, half_edges) = pattern.link_facets(points, faces)
+    folded_polygons = [geo.Polygon([folded_points[point_idx] for point_idx in face]) for face in faces]
+    assignments = {}
+    for ((idx0, idx1), assignment) in zip(edges, edge_assignments):
+        assignments[(points[idx0], points[idx1])] = assignment
+        assignments[(points[idx1], points[idx0])] = assignment
+    parities = face_parities(facets, folded_polygons, half_edges, assignments)
+    idx = 0
+    for (facet, folded_polygon, parity) in zip(facets, folded_polygons, parities):
+        facet.parity = parity
+        facet.transform = face_transform(facet, folded_polygon, idx)
+        idx += 1
+    return pattern.sheet(facets, half_edges, depths=depths)
+
+def load(path):
+    with open(path) as f:
+        return read(f)
@@ -0,0 +1,203 @@
+import collections
+import math
+
+import geo
+import geoutil
+import paper
+
+GRID_CELLS = 64
+# Neighboring slivers can lie closer than MIN_DISTANCE on either side of
+# their shared edge, so only a deeper crossing counts as an overlap.
+OVERLAP_DISTANCE = geoutil.polygon.MIN_DISTANCE * geoutil.polygon.MIN_DISTANCE
+
+def extent(coords):
+    xs = [x for (x, y) in coords]
+    ys = [y for (x, y) in coords]
+    size = max(max(xs) - min(xs), max(ys) - min(ys))
+    if size <= 0:
+        raise ValueError('crease pattern has no extent')
+    return (min(xs), min(ys), size)
+
+def normalize(coords):
+    (min_x, min_y, size) = extent(coords)
+    return [geo.Point((x - min_x) / size, (y - min_y) / size) for (x, y) in coords]
+
+def check_face(face, num_points, idx):
+    if len(face) < 3:
+        raise ValueError('face %s has fewer than three vertices' % idx)
+    if not all(isinstance(point_idx, int) and 0 <= point_idx < num_points for point_idx in face):
+        raise ValueError('face %s has a vertex out of range' % idx)
+    if len(set(face)) < len(face):
+        raise ValueError('face %s repeats a vertex' % idx)
+
+def distances(polygon, line):
+    return [point.x * line.normal.x + point.y * line.normal.y - line.offset for point in polygon.points]
+
+def separated(polygon0, lines0, polygon1, lines1):
+    # Either orientation of an edge line will do, which keeps slivers whose
+    # centroid sits on their own edges working.
+    for (polygon, lines, other) in ((polygon0, lines0, polygon1), (polygon1, lines1, polygon0)):
+        for line in lines:
+            for side in (line, geo.Line(-line.normal, -line.offset)):
+                if (min(distances(polygon, side)) > -OVERLAP_DISTANCE and
+                        max(distances(other, side)) < OVERLAP_DISTANCE):
+                    return True
+    return False
+
+def check_overlaps(facets):
+    box = None
+    for facet in facets:
+        box = geoutil.box.union(box, facet.box)
+    grid = geoutil.grid.Grid(max(box.max.x - box.min.x, box.max.y - box.min.y) / GRID_CELLS)
+    idx = 0
+    for facet in facets:
+        (min_x, min_y) = grid.cell(facet.box.min.x, facet.box.min.y)
+        (max_x, max_y) = grid.cell(facet.box.max.x, facet.box.max.y)
+        grid.add(idx, [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)])
+        idx += 1
+    lines = [geoutil.polygon.edge_lines(facet.polygon) for facet in facets]
+    for (idx, keys) in grid.item_cells.items():
+        others = set()
+        for key in keys:
+            others.update(grid.cells[key])
+        for other_idx in others:
+            if (other_idx > idx and geoutil.box.intersects(facets[idx].box, facets[other_idx].box) and
+                    not separated(facets[idx].polygon, lines[idx], facets[other_idx].polygon, lines[other_idx])):
+                raise ValueError('faces %s and %s overlap' % (idx, other_idx))
+
+def link_facets(points, faces):
+    half_edges = paper.HalfEdges()
+    unmatched = {}
+    used = set()
+    facets = []
+    for face in faces:
+        check_face(face, len(points), len(facets))
+        facet = paper.Facet(geo.Polygon([points[idx] for idx in face]), 1)
+        if geoutil.polygon.signed_area(facet.polygon) == 0:
+            raise ValueError('face %s has no area' % len(facets))
+        if not geoutil.polygon.is_convex(facet.polygon):
+            raise ValueError('face %s is not convex' % len(facets))
+        edge = half_edges.add_loop(facet, facet.polygon.points)
+        for (idx0, idx1) in zip(face, face[1:] + face[:1]):
+            # A third face on an edge, or a second one running the same way,
+            # folds the crease pattern over itself.
+            if (idx0, idx1) in used:
+                raise ValueError('face %s shares edge %s-%s with more than one face' % (len(facets), idx0, idx1))
+            used.add((idx0, idx1))
+            twin = unmatched.pop((idx1, idx0), None)
+            if twin is None:
+                unmatched[(idx0, idx1)] = edge
+            else:
+                half_edges.link(edge, twin)
+            edge += 1
+        facets.append(facet)
+    check_overlaps(facets)
+    return (facets, half_edges)
+
+def sheet(facets, half_edges, depths=None):
+    if depths is None:
+        layers = [paper.Layer(facets, 0)]
+    else:
+        layer_facets = collections.defaultdict(list)
+        for (facet, depth) in zip(facets, depths):
+            layer_facets[depth].append(facet)
+        layers = [paper.Layer(layer_facets[depth], idx) for (idx, depth) in enumerate(sorted(layer_facets))]
+    result = paper.Sheet()
+    result.set_layers(layers, half_edges)
+    return result
+
+def split_segments(segments, tolerance):
+    point_table = geoutil.point.PointTable(tolerance)
+    point_idxs = {}
+    points = []
+
+    def vertex(point):
+        point = point_table.intern(point)
+        idx = point_idxs.get(point)
+        if idx is None:
+            idx = len(points)
+            point_idxs[point] = idx
+            points.append(point)
+        return idx
+
+    segments = [segment for segment in segments if segment.length2() > tolerance * tolerance]
+    box = geoutil.box.from_points([point for segment in segments for point in segment.points()])
+    grid = geoutil.grid.Grid(max(box.max.x - box.min.x, box.max.y - box.min.y) / GRID_CELLS)
+    idx = 0
+    for segment in segments:
+        grid.insert_segment(idx, segment)
+        idx += 1
+
+    edges = set()
+    idx = 0
+    for segment in segments:
+        line = geoutil.line.from_segment(segment)
+        others = set()
+        for (cell_x, cell_y) in grid.item_cells[idx]:
+            # Sampling may skip a cell that a segment only clips at a corner.
+            for key in ((cell_x + dx, cell_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                others.update(grid.cells.get(key, ()))
+        others.discard(idx)
+        split_points = [segment.start, segment.end]
+        for other_idx in others:
+            other = segments[other_idx]
+            point = geoutil.segment.intersect(segment, other)
+            if point:
+                split_points.append(point)
+            for point in other.points():
+                if (geoutil.line.distance_to_point(line, point) < tolerance and
+                        geoutil.segment.is_point_within(segment, point)):
+                    split_points.append(point)
+        split_points.sort(key=lambda point: (point - segment.start).magnitude2())
+        last_idx = None
+        for point in split_points:
+            point_idx = vertex(point)
+            if last_idx is not None and last_idx != point_idx:
+                edges.add((min(last_idx, point_idx), max(last_idx, point_idx)))
+            last_idx = point_idx
+        idx += 1
+    return (points, edges)
+
+def trace_faces(points, edges):
+    # Bounded faces come out with the orientation of the unit square and
+    # outer boundaries with the opposite one.
+    adjacent = collections.defaultdict(set)
+    for (idx0, idx1) in edges:
+        adjacent[idx0].add(idx1)
+        adjacent[idx1].add(idx0)
+    dangling = [idx for idx in adjacent if len(adjacent[idx]) == 1]
+    while dangling:
+        idx = dangling.pop()
+        for other_idx in adjacent.pop(idx, ()):
+            adjacent[other_idx].discard(idx)
+            if len(adjacent[other_idx]) == 1:
+                dangling.append(other_idx)
+
+    around = {}
+    for (idx, others) in adjacent.items():
+        point = points[idx]
+        around[idx] = sorted(others, key=lambda other_idx: math.atan2(points[other_idx].y - point.y,
+                                                                       points[other_idx].x - point.x))
+    faces = []
+    visited = set()
+    for (start_idx, others) in around.items():
+        for next_idx in others:
+            if (start_idx, next_idx) in visited:
+                continue
+            face = []
+            (idx0, idx1) = (start_idx, next_idx)
+            while (idx0, idx1) not in visited:
+                visited.add((idx0, idx1))
+                face.append(idx0)
+                turns = around[idx1]
+                (idx0, idx1) = (idx1, turns[(turns.index(idx0) + 1) % len(turns)])
+            if geoutil.polygon.signed_area(geo.Polygon([points[idx] for idx in face])) < 0:
+                faces.append(face)
+    return faces
+
+def from_segments(segments, tolerance=geoutil.polygon.MIN_DISTANCE):
+    (points, edges) = split_segments(segments, tolerance)
+    faces = trace_faces(points, edges)
+    if not faces:
+        raise ValueError('crease pattern has no faces')
+    return sheet(*link_facets(points, faces))
@@ -0,0 +1,217 @@
+import array
+import mmap
+import struct
+import sys
+
+import geo
+import geoutil
+import paper
+
+MAGIC = b'ORIGAMI\0'
+VERSION = 3
+HEADER = struct.Struct('<8sIIIIII')
+
+class Snapshot(object):
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError('snapshots can only be mapped on little-endian machines')
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.sections = []
+        try:
+            self.map_sections(path)
+            if not self.valid_indices():
+                raise ValueError('%s has indices out of range' % path)
+        except BaseException:
+            self.close()
+            raise
+
+    def __repr__(self):
+        return 'formats.snapshot.Snapshot(%s facets, %s layers)' % (self.num_facets, self.num_layers)
+
+    def map_sections(self, path):
+        if len(self.map) < HEADER.size:
+            raise ValueError('%s is not a sheet snapshot' % path)
+        (magic, version, self.num_points, self.num_folded_points, self.num_facets, self.num_layers,
+         self.num_corners) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError('%s is not a sheet snapshot' % path)
+        if version != VERSION:
+            raise ValueError('%s has unsupported snapshot version %s' % (path, version))
+
+        sections = [
+            ('coords', 'd', 2 * self.num_points),
+            ('folded_coords', 'd', 2 * self.num_folded_points),
+            ('facet_transforms', 'd', 6 * self.num_facets),
+            ('facet_starts', 'I', self.num_facets + 1),
+            ('facet_points', 'I', self.num_corners),
+            ('facet_folded_points', 'I', self.num_corners),
+            ('facet_neighbors', 'i', 2 * self.num_corners),
+            ('layer_starts', 'I', self.num_layers + 1),
+            ('facet_parities', 'B', self.num_facets),
+        ]
+        size = HEADER.size + sum(array.array(typecode).itemsize * count for (_, typecode, count) in sections)
+        if len(self.map) != size:
+            raise ValueError('%s is %s bytes but its header needs %s' % (path, len(self.map), size))
+
+        view = memoryview(self.map)
+        offset = HEADER.size
+        for (name, typecode, count) in sections:
+            (data, offset) = section(view, offset, typecode, count)
+            setattr(self, name, data)
+            self.sections.append(data)
+
+    def valid_indices(self):
+        # Neighbor corners are checked while linking, where the facet sizes are known.
+        facet_starts = self.facet_starts
+        layer_starts = self.layer_starts
+        if facet_starts[0] != 0 or facet_starts[-1] != self.num_corners:
+            return False
+        if any(end - start < 3 for (start, end) in zip(facet_starts, facet_starts[1:])):
+            return False
+        if layer_starts[0] != 0 or layer_starts[-1] != self.num_facets:
+            return False
+        if any(end < start for (start, end) in zip(layer_starts, layer_starts[1:])):
+            return False
+        if self.num_corners and (max(self.facet_points) >= self.num_points or
+                                 max(self.facet_folded_points) >= self.num_folded_points):
+            return False
+        if self.num_corners and (min(self.facet_neighbors[0::2]) < -1 or
+                                 max(self.facet_neighbors[0::2]) >= self.num_facets):
+            return False
+        return not self.num_facets or max(self.facet_parities) <= 1
+
+    def close(self):
+        for data in self.sections:
+            data.release()
+        self.sections = []
+        self.map.close()
+
+    def half_edge(self, idx, corner):
+        # Corner i ends the half-edge that starts at corner i - 1, and half-edges
+        # are numbered like corners.
+        start = self.facet_starts[idx]
+        return start + (corner - 1) % (self.facet_starts[idx + 1] - start)
+
+    def link_facet(self, half_edges, idx):
+        facet_starts = self.facet_starts
+        start = facet_starts[idx]
+        for corner in range(start, facet_starts[idx + 1]):
+            neighbor_idx = self.facet_neighbors[2 * corner]
+            if neighbor_idx != -1:
+                neighbor_corner = self.facet_neighbors[2 * corner + 1]
+                if not 0 <= neighbor_corner < facet_starts[neighbor_idx + 1] - facet_starts[neighbor_idx]:
+                    raise ValueError('%s has indices out of range' % self.path)
+                edge = self.half_edge(idx, corner - start)
+                half_edges.twin[edge] = self.half_edge(neighbor_idx, neighbor_corner)
+
+    def sheet(self):
+        # The folded points were interned when the sheet was saved.
+        points = [geo.Point(x, y) for (x, y) in zip(self.coords[0::2], self.coords[1::2])]
+        folded_points = [geo.Point(x, y) for (x, y) in zip(self.folded_coords[0::2], self.folded_coords[1::2])]
+        point_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
+        for point in folded_points:
+            point_table.add(point)
+
+        half_edges = paper.HalfEdges()
+        facets = []
+        for idx in range(self.num_facets):
+            start = self.facet_starts[idx]
+            end = self.facet_starts[idx + 1]
+            polygon = geo.Polygon([folded_points[point_idx] for point_idx in self.facet_folded_points[start:end]])
+            transform = geo.Transform(*self.facet_transforms[6 * idx:6 * idx + 6])
+            facet = paper.Facet(polygon, self.facet_parities[idx], transform)
+            half_edges.add_loop(facet, [points[point_idx] for point_idx in self.facet_points[start:end]])
+            facets.append(facet)
+        for idx in range(self.num_facets):
+            self.link_facet(half_edges, idx)
+        layers = []
+        for layer_idx in range(self.num_layers):
+            layers.append(paper.Layer(facets[self.layer_starts[layer_idx]:self.layer_starts[layer_idx + 1]], layer_idx))
+        sheet = paper.Sheet()
+        sheet.set_layers(layers, half_edges, point_table)
+        return sheet
+
+def section(view, offset, typecode, count):
+    size = array.array(typecode).itemsize * count
+    data = view[offset:offset + size].cast(typecode)
+    return (data, offset + size)
+
+def write_array(f, typecode, values):
+    data = array.array(typecode, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    data.tofile(f)
+
+def transform_values(transform):
+    return (transform.a, transform.b, transform.c, transform.d, transform.e, transform.f)
+
+def save(sheet, path):
+    point_idxs = {}
+    coords = []
+    facet_idxs = {}
+    facets = []
+    layer_starts = [0]
+    for layer in sheet.layers:
+        for facet in layer.facets:
+            facet_idxs[facet] = len(facets)
+            facets.append(facet)
+        layer_starts.append(len(facets))
+
+    half_edges = sheet.edges
+    loops = [list(half_edges.loop(facet.edge)) for facet in facets]
+    edge_corners = {}
+    for loop in loops:
+        for (idx, edge) in enumerate(loop):
+            edge_corners[edge] = (idx + 1) % len(loop)
+
+    folded_point_idxs = {}
+    folded_coords = []
+    facet_starts = [0]
+    facet_points = []
+    facet_folded_points = []
+    facet_neighbors = []
+    for (facet, loop) in zip(facets, loops):
+        for edge in loop:
+            point = half_edges.points[edge]
+            idx = point_idxs.get(point)
+            if idx is None:
+                idx = len(point_idxs)
+                point_idxs[point] = idx
+                coords.extend((point.x, point.y))
+            facet_points.append(idx)
+        for point in facet.polygon.points:
+            idx = folded_point_idxs.get(point)
+            if idx is None:
+                idx = len(folded_point_idxs)
+                folded_point_idxs[point] = idx
+                folded_coords.extend((point.x, point.y))
+            facet_folded_points.append(idx)
+        for idx in range(len(loop)):
+            twin = half_edges.twin[loop[idx - 1]]
+            if twin != -1:
+                facet_neighbors.extend((facet_idxs[half_edges.facet[twin]], edge_corners[twin]))
+            else:
+                facet_neighbors.extend((-1, -1))
+        facet_starts.append(len(facet_points))
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(point_idxs), len(folded_point_idxs), len(facets), len(sheet.layers),
+                            len(facet_points)))
+        write_array(f, 'd', coords)
+        write_array(f, 'd', folded_coords)
+        write_array(f, 'd', [value for facet in facets for value in transform_values(facet.transform)])
+        write_array(f, 'I', facet_starts)
+        write_array(f, 'I', facet_points)
+        write_array(f, 'I', facet_folded_points)
+        write_array(f, 'i', facet_neighbors)
+        write_array(f, 'I', layer_starts)
+        write_array(f, 'B', [facet.parity for facet in facets])
+
+def load(path):
+    snapshot = Snapshot(path)
+    try:
+        return snapshot.sheet()
+    finally:
+        snapshot.close()
@@ -0,0 +1,93 @@
+import re
+import xml.etree.ElementTree
+
+import geo
+import geoutil
+
+from . import pattern
+
+STYLE = '''
+  .front { fill: #ffffff; }
+  .back { fill: #ffff80; }
+  .front, .back, .B { stroke: #000000; }
+  .M { stroke: #ff0000; }
+  .V { stroke: #0000ff; }
+  .F { stroke: #808080; }
+  polygon, line { stroke-width: 1; stroke-linejoin: round; vector-effect: non-scaling-stroke; }
+'''
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+def format_number(value):
+    return '%.9g' % value
+
+def write_header(f, box):
+    margin = 0.02 * max(box.max.x - box.min.x, box.max.y - box.min.y)
+    view_box = (box.min.x - margin, box.min.y - margin,
+                box.max.x - box.min.x + 2 * margin, box.max.y - box.min.y + 2 * margin)
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<svg xmlns="http://www.w3.org/2000/svg" viewBox="%s">\n' % ' '.join(format_number(value) for value in view_box))
+    f.write('<style>%s</style>\n' % STYLE)
+
+def write_folded(sheet, f):
+    box = None
+    for layer in sheet.layers:
+        box = geoutil.box.union(box, layer.box)
+    write_header(f, box)
+    for facet in sheet.facets():
+        f.write('<polygon class="%s" points="%s"/>\n' % (
+            'front' if facet.parity else 'back',
+            ' '.join('%s,%s' % (format_number(point.x), format_number(point.y)) for point in facet.polygon.points)))
+    f.write('</svg>\n')
+
+def write_crease_pattern(sheet, f):
+    box = None
+    for facet in sheet.facets():
+        box = geoutil.box.union(box, geoutil.box.from_points(sheet.paper_polygon(facet).points))
+    write_header(f, box)
+    half_edges = sheet.edges
+    for (edge, assignment) in sheet.creases():
+        start = half_edges.points[edge]
+        end = half_edges.points[half_edges.next[edge]]
+        f.write('<line class="%s" x1="%s" y1="%s" x2="%s" y2="%s"/>\n' % (
+            assignment, format_number(start.x), format_number(start.y), format_number(end.x), format_number(end.y)))
+    f.write('</svg>\n')
+
+def save(sheet, path, crease_pattern=False):
+    with open(path, 'w') as f:
+        if crease_pattern:
+            write_crease_pattern(sheet, f)
+        else:
+            write_folded(sheet, f)
+
+def element_coords(element):
+    tag = element.tag.rpartition('}')[2]
+    if tag == 'line':
+        yield [(float(element.get('x1', 0)), float(element.get('y1', 0))),
+               (float(element.get('x2', 0)), float(element.get('y2', 0)))]
+    elif tag in ('polyline', 'polygon'):
+        values = [float(value) for value in NUMBER.findall(element.get('points', ''))]
+        coords = list(zip(values[::2], values[1::2]))
+        if tag == 'polygon' and coords:
+            coords.append(coords[0])
+        yield coords
+
+def read(f):
+    # Transforms and paths are not interpreted.
+    coords = []
+    try:
+        for (_, element) in xml.etree.ElementTree.iterparse(f):
+            for polyline in element_coords(element):
+                coords.extend(zip(polyline, polyline[1:]))
+            element.clear()
+    except xml.etree.ElementTree.ParseError as e:
+        raise ValueError(str(e))
+    if not coords:
+        raise ValueError('SVG file has no lines')
+    points = pattern.normalize([coord for segment in coords for coord in segment])
+    segments = [geo.Segment(points[idx], points[idx + 1]) for idx in range(0, len(points), 2)]
+    return pattern.from_segments(segments)
+
+def load(path):
+    with open(path, 'rb') as f:
+        return read(f)
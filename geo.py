@@ -1,6 +1,8 @@
 import math
 
 class Point(object):
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -26,9 +28,11 @@ class Point(object):
             return Point(self.x - other.x, self.y - other.y)
 
     def vector(self):
-        return self - Point(0, 0)
+        return Vector(self.x, self.y)
 
 class Vector(object):
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -63,10 +67,13 @@ class Vector(object):
         return self.__div__(other)
 
     def __neg__(self):
-        return self * -1
+        return Vector(-self.x, -self.y)
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y
 
     def magnitude2(self):
-        return self * self
+        return self.x * self.x + self.y * self.y
 
     def magnitude(self):
         return math.sqrt(self.magnitude2())
@@ -75,6 +82,8 @@ class Vector(object):
         return self / self.magnitude()
 
 class Line(object):
+    __slots__ = ('normal', 'offset')
+
     def __init__(self, normal, offset):
         self.normal = normal
         self.offset = offset
@@ -91,6 +100,8 @@ class Line(object):
         return hash((self.normal, self.offset))
 
 class Segment(object):
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
         self.start = start
         self.end = end
@@ -104,7 +115,9 @@ class Segment(object):
         return self.start == other.start and self.end == other.end
 
     def __hash__(self):
-        return hash((self.start, self.end))
+        start = self.start
+        end = self.end
+        return hash((start.x, start.y, end.x, end.y))
 
     def points(self):
         return [self.start, self.end]
@@ -115,7 +128,27 @@ class Segment(object):
     def length2(self):
         return (self.end - self.start).magnitude2()
 
+class Box(object):
+    __slots__ = ('min', 'max')
+
+    def __init__(self, min, max):
+        self.min = min
+        self.max = max
+
+    def __repr__(self):
+        return 'geo.Box(%s, %s)' % (self.min, self.max)
+
+    def __eq__(self, other):
+        if type(other) != type(self):
+            return False
+        return self.min == other.min and self.max == other.max
+
+    def __hash__(self):
+        return hash((self.min, self.max))
+
 class Polygon(object):
+    __slots__ = ('points',)
+
     def __init__(self, points):
         self.points = points
 
@@ -136,4 +169,27 @@ class Polygon(object):
         for point in self.points:
             segments.append(Segment(last_point, point))
             last_point = point
-        return segments
\ No newline at end of file
+        return segments
+
+class Transform(object):
+    __slots__ = ('a', 'b', 'c', 'd', 'e', 'f')
+
+    def __init__(self, a, b, c, d, e, f):
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.e = e
+        self.f = f
+
+    def __repr__(self):
+        return 'geo.Transform(%s, %s, %s, %s, %s, %s)' % (self.a, self.b, self.c, self.d, self.e, self.f)
+
+    def __eq__(self, other):
+        if type(other) != type(self):
+            return False
+        return (self.a == other.a and self.b == other.b and self.c == other.c and
+                self.d == other.d and self.e == other.e and self.f == other.f)
+
+    def __hash__(self):
+        return hash((self.a, self.b, self.c, self.d, self.e, self.f))
@@ -1,6 +1,11 @@
+from . import array
+from . import box
+from . import candidates
+from . import grid
 from . import huzita_justin
 from . import line
 from . import point
 from . import polygon
 from . import segment
+from . import transform
 from . import vector
\ No newline at end of file
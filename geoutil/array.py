@@ -0,0 +1,205 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import geo
+import geoutil
+
+NUMPY_MIN_POINTS = 32
+
+def polygon_coords(polygon):
+    points = polygon.points
+    return ([point.x for point in points], [point.y for point in points])
+
+class PolygonArray(object):
+    def __init__(self, polygons, coords=None):
+        self.polygons = polygons
+        if coords is None:
+            coords = [polygon_coords(polygon) for polygon in polygons]
+        xs = []
+        ys = []
+        starts = []
+        for (polygon_xs, polygon_ys) in coords:
+            starts.append(len(xs))
+            xs.extend(polygon_xs)
+            ys.extend(polygon_ys)
+
+        self.vectorized = numpy is not None and len(xs) >= NUMPY_MIN_POINTS
+        if self.vectorized:
+            self.xs = numpy.array(xs, dtype=float)
+            self.ys = numpy.array(ys, dtype=float)
+            self.starts = numpy.array(starts, dtype=numpy.intp)
+        else:
+            self.xs = xs
+            self.ys = ys
+            self.starts = starts
+
+    def __repr__(self):
+        return 'geoutil.array.PolygonArray(%s)' % self.polygons
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def test_line(self, line):
+        if not self.polygons:
+            return []
+        if self.vectorized:
+            return self.test_line_numpy(line)
+        return self.test_line_python(line)
+
+    def test_line_numpy(self, line):
+        distances = self.xs * line.normal.x + self.ys * line.normal.y - line.offset
+        below = numpy.add.reduceat(distances <= -geoutil.polygon.MIN_DISTANCE, self.starts)
+        above = numpy.add.reduceat(distances >= geoutil.polygon.MIN_DISTANCE, self.starts)
+        results = numpy.where(below == 0, 1, numpy.where(above == 0, -1, 0))
+        return results.tolist()
+
+    def test_line_python(self, line):
+        nx = line.normal.x
+        ny = line.normal.y
+        offset = line.offset
+        min_distance = geoutil.polygon.MIN_DISTANCE
+        xs = self.xs
+        ys = self.ys
+        ends = list(self.starts[1:]) + [len(xs)]
+        results = []
+        for (start, end) in zip(self.starts, ends):
+            below = False
+            above = False
+            for idx in range(start, end):
+                distance = xs[idx] * nx + ys[idx] * ny - offset
+                if distance <= -min_distance:
+                    below = True
+                elif distance >= min_distance:
+                    above = True
+            if not below:
+                results.append(1)
+            elif not above:
+                results.append(-1)
+            else:
+                results.append(0)
+        return results
+
+class SegmentArray(object):
+    def __init__(self, segments):
+        self.segments = segments
+        coords = ([], [], [], [])
+        for segment in segments:
+            coords[0].append(segment.start.x)
+            coords[1].append(segment.start.y)
+            coords[2].append(segment.end.x)
+            coords[3].append(segment.end.y)
+
+        if numpy is not None:
+            coords = [numpy.array(values, dtype=float) for values in coords]
+        (self.start_xs, self.start_ys, self.end_xs, self.end_ys) = coords
+
+    def __repr__(self):
+        return 'geoutil.array.SegmentArray(%s)' % self.segments
+
+    def __len__(self):
+        return len(self.segments)
+
+    def intersect_lines(self, lines):
+        if not self.segments or not lines:
+            return []
+        if numpy is not None:
+            return self.intersect_lines_numpy(lines)
+        return self.intersect_lines_python(lines)
+
+    def intersect_lines_numpy(self, lines):
+        nxs = numpy.array([line.normal.x for line in lines], dtype=float)[:, None]
+        nys = numpy.array([line.normal.y for line in lines], dtype=float)[:, None]
+        offsets = numpy.array([line.offset for line in lines], dtype=float)[:, None]
+        dxs = self.end_xs - self.start_xs
+        dys = self.end_ys - self.start_ys
+        denominators = nxs * dxs + nys * dys
+        numerators = offsets - nxs * self.start_xs - nys * self.start_ys
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            ts = numerators / denominators
+        (line_idxs, segment_idxs) = numpy.nonzero((denominators != 0) & (ts > 0) & (ts < 1))
+        ts = ts[line_idxs, segment_idxs]
+        xs = self.start_xs[segment_idxs] + dxs[segment_idxs] * ts
+        ys = self.start_ys[segment_idxs] + dys[segment_idxs] * ts
+        return [geo.Point(x, y) for (x, y) in zip(xs.tolist(), ys.tolist())]
+
+    def intersect_lines_python(self, lines):
+        points = []
+        for line in lines:
+            nx = line.normal.x
+            ny = line.normal.y
+            offset = line.offset
+            for idx in range(len(self.segments)):
+                start_x = self.start_xs[idx]
+                start_y = self.start_ys[idx]
+                dx = self.end_xs[idx] - start_x
+                dy = self.end_ys[idx] - start_y
+                denominator = nx * dx + ny * dy
+                if denominator == 0:
+                    continue
+                t = (offset - nx * start_x - ny * start_y) / denominator
+                if 0 < t < 1:
+                    points.append(geo.Point(start_x + dx * t, start_y + dy * t))
+        return points
+
+class LineArray(object):
+    def __init__(self, lines):
+        self.lines = lines
+        nxs = [line.normal.x for line in lines]
+        nys = [line.normal.y for line in lines]
+        offsets = [line.offset for line in lines]
+
+        if numpy is not None:
+            self.nxs = numpy.array(nxs, dtype=float)
+            self.nys = numpy.array(nys, dtype=float)
+            self.offsets = numpy.array(offsets, dtype=float)
+        else:
+            self.nxs = nxs
+            self.nys = nys
+            self.offsets = offsets
+
+    def __repr__(self):
+        return 'geoutil.array.LineArray(%s)' % self.lines
+
+    def __len__(self):
+        return len(self.lines)
+
+    def intersect_lines(self, lines, ends=None):
+        return [point for (_, _, point) in self.intersect_pairs(lines, ends)]
+
+    def intersect_pairs(self, lines, ends=None):
+        if ends is None:
+            ends = [len(self.lines)] * len(lines)
+        if not self.lines or not lines:
+            return []
+        if numpy is not None:
+            return self.intersect_pairs_numpy(lines, ends)
+        return self.intersect_pairs_python(lines, ends)
+
+    def intersect_pairs_numpy(self, lines, ends):
+        nxs = numpy.array([line.normal.x for line in lines], dtype=float)[:, None]
+        nys = numpy.array([line.normal.y for line in lines], dtype=float)[:, None]
+        offsets = numpy.array([line.offset for line in lines], dtype=float)[:, None]
+        ends = numpy.array(ends, dtype=numpy.intp)[:, None]
+        dets = nxs * self.nys - nys * self.nxs
+        xdets = offsets * self.nys - nys * self.offsets
+        ydets = nxs * self.offsets - offsets * self.nxs
+        limits = numpy.abs(geoutil.line.MAX_DISTANCE * dets)
+        valid = (numpy.abs(xdets) < limits) & (numpy.abs(ydets) < limits)
+        valid &= numpy.arange(len(self.lines))[None, :] < ends
+        (line_idxs, other_idxs) = numpy.nonzero(valid)
+        dets = dets[line_idxs, other_idxs]
+        xs = xdets[line_idxs, other_idxs] / dets
+        ys = ydets[line_idxs, other_idxs] / dets
+        return [(line_idx, other_idx, geo.Point(x, y)) for (line_idx, other_idx, x, y) in
+                zip(line_idxs.tolist(), other_idxs.tolist(), xs.tolist(), ys.tolist())]
+
+    def intersect_pairs_python(self, lines, ends):
+        pairs = []
+        for (line_idx, (line, end)) in enumerate(zip(lines, ends)):
+            for other_idx in range(end):
+                point = geoutil.line.intersect(line, self.lines[other_idx])
+                if point:
+                    pairs.append((line_idx, other_idx, point))
+        return pairs
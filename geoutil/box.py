@@ -0,0 +1,32 @@
+import geo
+import geoutil
+
+def from_points(points):
+    xs = [point.x for point in points]
+    ys = [point.y for point in points]
+    return geo.Box(geo.Point(min(xs), min(ys)), geo.Point(max(xs), max(ys)))
+
+def union(box0, box1):
+    if box0 is None:
+        return box1
+    if box1 is None:
+        return box0
+    return geo.Box(geo.Point(min(box0.min.x, box1.min.x), min(box0.min.y, box1.min.y)),
+                   geo.Point(max(box0.max.x, box1.max.x), max(box0.max.y, box1.max.y)))
+
+def test_line(box, line):
+    nx = line.normal.x
+    ny = line.normal.y
+    (low_x, high_x) = (box.min.x, box.max.x) if nx >= 0 else (box.max.x, box.min.x)
+    (low_y, high_y) = (box.min.y, box.max.y) if ny >= 0 else (box.max.y, box.min.y)
+    if low_x * nx + low_y * ny - line.offset > -geoutil.polygon.MIN_DISTANCE:
+        return 1
+    if high_x * nx + high_y * ny - line.offset < geoutil.polygon.MIN_DISTANCE:
+        return -1
+    return 0
+
+def intersects(box0, box1):
+    return (box0.min.x < box1.max.x - geoutil.polygon.MIN_DISTANCE and
+            box1.min.x < box0.max.x - geoutil.polygon.MIN_DISTANCE and
+            box0.min.y < box1.max.y - geoutil.polygon.MIN_DISTANCE and
+            box1.min.y < box0.max.y - geoutil.polygon.MIN_DISTANCE)
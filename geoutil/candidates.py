@@ -0,0 +1,320 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import geo
+import geoutil
+
+MAX_ROWS = 1 << 16
+
+AXIOMS = {
+    'O1': ('PP', True),
+    'O2': ('PP', True),
+    'O3': ('LL', True),
+    'O4': ('PL', False),
+    'O5': ('PPL', False),
+    'O6': ('PPLL', False),
+    'O7': ('PLL', False),
+}
+
+class Candidates(object):
+    def __init__(self, axiom, nxs, nys, offsets, args):
+        self.axiom = axiom
+        self.nxs = nxs
+        self.nys = nys
+        self.offsets = offsets
+        self.args = args
+
+    def __repr__(self):
+        return 'geoutil.candidates.Candidates(%s, %s)' % (self.axiom, len(self))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        nxs = self.nxs
+        nys = self.nys
+        offsets = self.offsets
+        args = self.args
+        if numpy is not None:
+            nxs = nxs.tolist()
+            nys = nys.tolist()
+            offsets = offsets.tolist()
+            args = args.tolist()
+        for idx in range(len(offsets)):
+            yield (geo.Line(geo.Vector(nxs[idx], nys[idx]), offsets[idx]), tuple(args[idx]))
+
+    def near(self, point, distance):
+        if numpy is not None:
+            valid = numpy.abs(self.nxs * point.x + self.nys * point.y - self.offsets) <= distance
+            return Candidates(self.axiom, self.nxs[valid], self.nys[valid], self.offsets[valid], self.args[valid])
+        idxs = [idx for idx in range(len(self.offsets))
+                if abs(self.nxs[idx] * point.x + self.nys[idx] * point.y - self.offsets[idx]) <= distance]
+        return Candidates(self.axiom, [self.nxs[idx] for idx in idxs], [self.nys[idx] for idx in idxs],
+                          [self.offsets[idx] for idx in idxs], [self.args[idx] for idx in idxs])
+
+def generate(axiom, points, lines, point_start=0, line_start=0, first=None):
+    (kinds, unordered) = AXIOMS[axiom]
+    counts = {'P': len(points), 'L': len(lines)}
+    if first is None:
+        first = (0, counts[kinds[0]])
+    if numpy is not None:
+        return generate_numpy(axiom, points, lines, point_start, line_start, first)
+    return generate_python(axiom, points, lines, point_start, line_start, first)
+
+def combinations_python(kinds, counts, starts, unordered, first):
+    def expand(idx, args, new):
+        if idx == len(kinds):
+            if new:
+                yield args
+            return
+        kind = kinds[idx]
+        (begin, end) = first if idx == 0 else (0, counts[kind])
+        if unordered and idx > 0:
+            begin = args[-1] + 1
+        for arg in range(begin, end):
+            if kind in kinds[:idx] and arg in [args[i] for i in range(idx) if kinds[i] == kind]:
+                continue
+            for ret in expand(idx + 1, args + (arg,), new or arg >= starts[kind]):
+                yield ret
+
+    return expand(0, (), False)
+
+def generate_python(axiom, points, lines, point_start, line_start, first):
+    (kinds, unordered) = AXIOMS[axiom]
+    function = getattr(geoutil.huzita_justin, axiom)
+    objects = {'P': points, 'L': lines}
+    counts = {'P': len(points), 'L': len(lines)}
+    starts = {'P': point_start, 'L': line_start}
+    nxs = []
+    nys = []
+    offsets = []
+    args_list = []
+    for args in combinations_python(kinds, counts, starts, unordered, first):
+        try:
+            result = function(*[objects[kind][arg] for (kind, arg) in zip(kinds, args)])
+        except ZeroDivisionError:
+            continue
+        if result is None:
+            continue
+        if isinstance(result, geo.Line):
+            result = [result]
+        for line in result:
+            nxs.append(line.normal.x)
+            nys.append(line.normal.y)
+            offsets.append(line.offset)
+            args_list.append(args)
+    return Candidates(axiom, nxs, nys, offsets, args_list)
+
+def combinations_numpy(kinds, counts, starts, unordered, first):
+    ranges = [numpy.arange(first[0], first[1])] + [numpy.arange(counts[kind]) for kind in kinds[1:]]
+    grids = numpy.meshgrid(*ranges, indexing='ij')
+    args = numpy.stack([grid.ravel() for grid in grids], axis=1)
+
+    valid = numpy.zeros(len(args), dtype=bool)
+    for (idx, kind) in enumerate(kinds):
+        valid |= args[:, idx] >= starts[kind]
+    for idx0 in range(len(kinds)):
+        for idx1 in range(idx0 + 1, len(kinds)):
+            if kinds[idx0] == kinds[idx1]:
+                if unordered:
+                    valid &= args[:, idx0] < args[:, idx1]
+                else:
+                    valid &= args[:, idx0] != args[:, idx1]
+    return args[valid]
+
+def coordinates(values, idxs):
+    xs = numpy.array([value.x for value in values], dtype=float)
+    ys = numpy.array([value.y for value in values], dtype=float)
+    return (xs[idxs], ys[idxs])
+
+def line_coordinates(values, idxs):
+    nxs = numpy.array([value.normal.x for value in values], dtype=float)
+    nys = numpy.array([value.normal.y for value in values], dtype=float)
+    offsets = numpy.array([value.offset for value in values], dtype=float)
+    return (nxs[idxs], nys[idxs], offsets[idxs])
+
+def generate_numpy(axiom, points, lines, point_start, line_start, first):
+    (kinds, unordered) = AXIOMS[axiom]
+    counts = {'P': len(points), 'L': len(lines)}
+    starts = {'P': point_start, 'L': line_start}
+    rows = 1
+    for kind in kinds[1:]:
+        rows *= counts[kind]
+    step = max(1, MAX_ROWS // max(rows, 1))
+
+    results = []
+    for begin in range(first[0], first[1], step):
+        args = combinations_numpy(kinds, counts, starts, unordered, (begin, min(begin + step, first[1])))
+        objects = []
+        for (idx, kind) in enumerate(kinds):
+            if kind == 'P':
+                objects.extend(coordinates(points, args[:, idx]))
+            else:
+                objects.extend(line_coordinates(lines, args[:, idx]))
+        for (nxs, nys, offsets, valid) in KERNELS[axiom](*objects):
+            valid &= numpy.isfinite(nxs) & numpy.isfinite(nys) & numpy.isfinite(offsets)
+            results.append((nxs[valid], nys[valid], offsets[valid], args[valid]))
+
+    if not results:
+        return Candidates(axiom, numpy.zeros(0), numpy.zeros(0), numpy.zeros(0),
+                          numpy.zeros((0, len(kinds)), dtype=numpy.intp))
+    return Candidates(axiom, *[numpy.concatenate(values) for values in zip(*results)])
+
+def o1(x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    length = numpy.hypot(dx, dy)
+    valid = length > 0
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        nxs = dy / length
+        nys = -dx / length
+    return [(nxs, nys, nxs * x0 + nys * y0, valid)]
+
+def o2(x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    length = numpy.hypot(dx, dy)
+    valid = length > 0
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        nxs = dx / length
+        nys = dy / length
+    offsets = (nxs * (x0 + x1) + nys * (y0 + y1)) / 2
+    return [(nxs, nys, offsets, valid)]
+
+def o3(nx0, ny0, offset0, nx1, ny1, offset1):
+    theta = (numpy.arctan2(ny0, nx0) + numpy.arctan2(ny1, nx1)) / 2
+    cos = numpy.cos(theta)
+    sin = numpy.sin(theta)
+    results = []
+    for (nxs, nys) in ((cos, sin), (-sin, cos)):
+        dot0 = nx0 * nxs + ny0 * nys
+        dot1 = nx1 * nxs + ny1 * nys
+        valid = (numpy.abs(offset0) <= numpy.abs(geoutil.huzita_justin.MAX_DISTANCE * dot0)) & (dot0 != 0)
+        valid &= (numpy.abs(offset1) <= numpy.abs(geoutil.huzita_justin.MAX_DISTANCE * dot1)) & (dot1 != 0)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            offsets = (offset0 / dot0 + offset1 / dot1) / 2
+        results.append((nxs, nys, offsets, valid))
+    return results
+
+def o4(x, y, nx, ny, offset):
+    nxs = ny
+    nys = -nx
+    return [(nxs, nys, nxs * x + nys * y, numpy.ones(len(x), dtype=bool))]
+
+def o5(x0, y0, x1, y1, nx, ny, offset):
+    distances = nx * x0 + ny * y0 - offset
+    start_x = x0 - nx * distances
+    start_y = y0 - ny * distances
+    disc = (x1 - x0) ** 2 + (y1 - y0) ** 2 - distances * distances
+    with numpy.errstate(invalid='ignore'):
+        d = numpy.sqrt(disc)
+    results = []
+    for sign in (1, -1):
+        image_x = start_x + ny * d * sign
+        image_y = start_y - nx * d * sign
+        for (nxs, nys, offsets, valid) in o2(image_x, image_y, x1, y1):
+            valid &= (image_x - x1) ** 2 + (image_y - y1) ** 2 > geoutil.huzita_justin.EPSILON
+            valid &= disc >= 0
+            if sign == -1:
+                valid &= disc > 0
+            results.append((nxs, nys, offsets, valid))
+    return results
+
+def o6(x0, y0, x1, y1, nx0, ny0, offset0, nx1, ny1, offset1):
+    dx = ny0
+    dy = -nx0
+    start_x = nx0 * offset0
+    start_y = ny0 * offset0
+    ex = start_x - x0
+    ey = start_y - y0
+    fx = x1 - x0
+    fy = y1 - y0
+    k = nx1 * x1 + ny1 * y1 - offset1
+
+    a0 = ex * ex + ey * ey
+    a1 = 2 * (ex * dx + ey * dy)
+    b0 = nx1 * ex + ny1 * ey
+    b1 = nx1 * dx + ny1 * dy
+    c0 = ex * fx + ey * fy
+    c1 = dx * fx + dy * fy
+    roots = solve_cubics(b1,
+                         k + b0 + b1 * a1 - 2 * b1 * c1,
+                         (k + b0) * a1 + b1 * a0 - 2 * (b1 * c0 + b0 * c1),
+                         (k + b0) * a0 - 2 * b0 * c0)
+
+    results = []
+    for t in roots:
+        image_x = start_x + dx * t
+        image_y = start_y + dy * t
+        for (nxs, nys, offsets, valid) in o2(x0, y0, image_x, image_y):
+            valid &= numpy.isfinite(t)
+            valid &= (image_x - x0) ** 2 + (image_y - y0) ** 2 > geoutil.huzita_justin.EPSILON
+            results.append((nxs, nys, offsets, valid))
+    return results
+
+def o7(x, y, nx0, ny0, offset0, nx1, ny1, offset1):
+    parallel = nx0 * x + ny0 * y
+    det = nx0 * ny1 - ny0 * nx1
+    xdet = parallel * ny1 - ny0 * offset1
+    ydet = nx0 * offset1 - parallel * nx1
+    limit = numpy.abs(geoutil.line.MAX_DISTANCE * det)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        image_x = xdet / det
+        image_y = ydet / det
+    results = []
+    for (nxs, nys, offsets, valid) in o2(x, y, image_x, image_y):
+        valid &= (numpy.abs(xdet) < limit) & (numpy.abs(ydet) < limit)
+        results.append((nxs, nys, offsets, valid))
+    return results
+
+KERNELS = {
+    'O1': o1,
+    'O2': o2,
+    'O3': o3,
+    'O4': o4,
+    'O5': o5,
+    'O6': o6,
+    'O7': o7,
+}
+
+def solve_cubics(a, b, c, d):
+    epsilon = geoutil.huzita_justin.EPSILON
+    scale = numpy.maximum(numpy.maximum(numpy.abs(a), numpy.abs(b)), numpy.maximum(numpy.abs(c), numpy.abs(d)))
+    cubic = numpy.abs(a) > epsilon * scale
+    quadratic = ~cubic & (numpy.abs(b) > epsilon * scale)
+    linear = ~cubic & ~quadratic & (numpy.abs(c) > epsilon * scale)
+    roots = numpy.full((3, len(a)), numpy.nan)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        b3 = b / a
+        c3 = c / a
+        d3 = d / a
+        shift = -b3 / 3
+        p = c3 - b3 * b3 / 3
+        q = 2 * b3 * b3 * b3 / 27 - b3 * c3 / 3 + d3
+        disc = q * q / 4 + p * p * p / 27
+
+        one = cubic & (disc > 0)
+        s = numpy.sqrt(numpy.where(one, disc, 0))
+        roots[0] = numpy.where(one, numpy.cbrt(-q / 2 + s) + numpy.cbrt(-q / 2 - s) + shift, roots[0])
+
+        triple = cubic & ~one & (p == 0)
+        roots[0] = numpy.where(triple, shift, roots[0])
+
+        three = cubic & ~one & ~triple
+        r = 2 * numpy.sqrt(numpy.where(three, -p / 3, 0))
+        phi = numpy.arccos(numpy.clip(3 * q / (p * r), -1, 1))
+        for k in range(3):
+            roots[k] = numpy.where(three, r * numpy.cos((phi - 2 * numpy.pi * k) / 3) + shift, roots[k])
+
+        qdisc = c * c - 4 * b * d
+        two = quadratic & (qdisc >= 0)
+        sq = numpy.sqrt(numpy.where(two, qdisc, 0))
+        roots[0] = numpy.where(two, (-c + sq) / (2 * b), roots[0])
+        roots[1] = numpy.where(two & (qdisc > 0), (-c - sq) / (2 * b), roots[1])
+
+        roots[0] = numpy.where(linear, -d / c, roots[0])
+
+    return roots
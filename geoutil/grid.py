@@ -0,0 +1,63 @@
+import math
+
+class Grid(object):
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.item_cells = {}
+
+    def __repr__(self):
+        return 'geoutil.grid.Grid(%s)' % self.cell_size
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def __contains__(self, item):
+        return item in self.item_cells
+
+    def cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def add(self, item, keys):
+        self.remove(item)
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = set()
+                self.cells[key] = cell
+            cell.add(item)
+        self.item_cells[item] = keys
+
+    def insert_point(self, item, point):
+        self.add(item, [self.cell(point.x, point.y)])
+
+    def insert_segment(self, item, segment):
+        start = segment.start
+        end = segment.end
+        steps = int(segment.length() * 2 / self.cell_size) + 1
+        keys = set()
+        for step in range(steps + 1):
+            t = step / steps
+            keys.add(self.cell(start.x + (end.x - start.x) * t, start.y + (end.y - start.y) * t))
+        self.add(item, list(keys))
+
+    def remove(self, item):
+        keys = self.item_cells.pop(item, None)
+        if keys is None:
+            return
+        for key in keys:
+            cell = self.cells[key]
+            cell.discard(item)
+            if not cell:
+                del self.cells[key]
+
+    def query(self, point, radius):
+        (min_x, min_y) = self.cell(point.x - radius, point.y - radius)
+        (max_x, max_y) = self.cell(point.x + radius, point.y + radius)
+        found = set()
+        for x in range(min_x - 1, max_x + 2):
+            for y in range(min_y - 1, max_y + 2):
+                cell = self.cells.get((x, y))
+                if cell:
+                    found.update(cell)
+        return found
@@ -4,6 +4,7 @@ import geo
 import geoutil
 
 MAX_DISTANCE = 1000
+EPSILON = 1e-12
 
 def O1(point0, point1):
     return geoutil.line.from_points(point0, point1)
@@ -24,13 +25,15 @@ def O3(line0, line1):
     sin = math.sin(theta)
     lines = []
     for normal in (geo.Vector(cos, sin), geo.Vector(-sin, cos)):
-        if abs(line0.offset) > abs(MAX_DISTANCE * (line0.normal * normal)):
+        dot0 = line0.normal * normal
+        dot1 = line1.normal * normal
+        if dot0 == 0 or abs(line0.offset) > abs(MAX_DISTANCE * dot0):
             continue
-        if abs(line1.offset) > abs(MAX_DISTANCE * (line1.normal * normal)):
+        if dot1 == 0 or abs(line1.offset) > abs(MAX_DISTANCE * dot1):
             continue
 
-        t0 = line0.offset / (line0.normal * normal)
-        t1 = line1.offset / (line1.normal * normal)
+        t0 = line0.offset / dot0
+        t1 = line1.offset / dot1
         offset = (t0 + t1) / 2
         lines.append(geo.Line(normal, offset))
 
@@ -40,24 +43,50 @@ def O4(point, line):
     return geoutil.line.perpendicular(line, point)
 
 def O5(point0, point1, line):
-    radius = point1 - point0
-    perp = geoutil.line.perpendicular(line, point0)
-    start = geoutil.line.intersect(perp, line)
-    offset = start - point0
-    disc = radius.magnitude2() - offset.magnitude2()
+    normal = line.normal
+    distance = point0.x * normal.x + point0.y * normal.y - line.offset
+    start = geo.Point(point0.x - normal.x * distance, point0.y - normal.y * distance)
+    disc = (point1 - point0).magnitude2() - distance * distance
 
-    lines = []
+    images = []
     if disc == 0:
-        lines.append(O2(start, point1))
+        images.append(start)
     elif disc > 0:
         d = math.sqrt(disc)
-        direction = geoutil.vector.perpendicular(line.normal)
+        direction = geoutil.vector.perpendicular(normal)
+        images.append(start + direction * d)
+        images.append(start - direction * d)
+
+    lines = []
+    for image in images:
+        if (image - point1).magnitude2() > EPSILON:
+            lines.append(O2(image, point1))
+    return lines
 
-        p = start + direction * d
-        lines.append(O2(p, point1))
+def O6(point0, point1, line0, line1):
+    direction = geoutil.vector.perpendicular(line0.normal)
+    start = geo.Point(line0.normal.x * line0.offset, line0.normal.y * line0.offset)
+    e = start - point0
+    f = point1 - point0
+    normal = line1.normal
+    k = normal.x * point1.x + normal.y * point1.y - line1.offset
 
-        p = start - direction * d
-        lines.append(O2(p, point1))
+    a0 = e.dot(e)
+    a1 = 2 * e.dot(direction)
+    b0 = normal.dot(e)
+    b1 = normal.dot(direction)
+    c0 = e.dot(f)
+    c1 = direction.dot(f)
+    roots = solve_cubic(b1,
+                        k + b0 + b1 * a1 - 2 * b1 * c1,
+                        (k + b0) * a1 + b1 * a0 - 2 * (b1 * c0 + b0 * c1),
+                        (k + b0) * a0 - 2 * b0 * c0)
+
+    lines = []
+    for t in roots:
+        image = start + direction * t
+        if (image - point0).magnitude2() > EPSILON:
+            lines.append(O2(point0, image))
 
     return lines
 
@@ -68,3 +97,43 @@ def O7(point, line0, line1):
         return O2(point, intersection)
     else:
         return None
+
+def solve_quadratic(a, b, c):
+    scale = max(abs(a), abs(b), abs(c))
+    if abs(a) <= EPSILON * scale:
+        if abs(b) <= EPSILON * scale:
+            return []
+        return [-c / b]
+
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return []
+    if disc == 0:
+        return [-b / (2 * a)]
+    d = math.sqrt(disc)
+    return [(-b + d) / (2 * a), (-b - d) / (2 * a)]
+
+def solve_cubic(a, b, c, d):
+    scale = max(abs(a), abs(b), abs(c), abs(d))
+    if abs(a) <= EPSILON * scale:
+        return solve_quadratic(b, c, d)
+
+    b /= a
+    c /= a
+    d /= a
+    shift = -b / 3
+    p = c - b * b / 3
+    q = 2 * b * b * b / 27 - b * c / 3 + d
+    disc = q * q / 4 + p * p * p / 27
+
+    if disc > 0:
+        s = math.sqrt(disc)
+        u = math.copysign(abs(-q / 2 + s) ** (1 / 3), -q / 2 + s)
+        v = math.copysign(abs(-q / 2 - s) ** (1 / 3), -q / 2 - s)
+        return [u + v + shift]
+    if p == 0:
+        return [shift]
+
+    r = 2 * math.sqrt(-p / 3)
+    phi = math.acos(max(-1, min(1, 3 * q / (p * r))))
+    return [r * math.cos((phi - 2 * math.pi * k) / 3) + shift for k in range(3)]
@@ -16,22 +16,17 @@ def intersect(line0, line1):
         return None
 
 def distance_to_point(line, point):
-    offset = point.vector() * line.normal
-    return abs(offset - line.offset)
+    normal = line.normal
+    return abs(point.x * normal.x + point.y * normal.y - line.offset)
 
 def parallel(line, point):
-    normal = line.normal
-    offset = normal * point.vector()
-    return geo.Line(normal, offset)
+    return from_point_normal(point, line.normal)
 
 def perpendicular(line, point):
-    normal = geoutil.vector.perpendicular(line.normal)
-    offset = normal * point.vector()
-    return geo.Line(normal, offset)
+    return from_point_normal(point, geoutil.vector.perpendicular(line.normal))
 
 def from_point_normal(point, normal):
-    offset = normal * point.vector()
-    return geo.Line(normal, offset)
+    return geo.Line(normal, point.x * normal.x + point.y * normal.y)
 
 def from_points(point0, point1):
     normal = geoutil.vector.perpendicular(point1 - point0).normalize()
@@ -39,3 +34,16 @@ def from_points(point0, point1):
 
 def from_segment(segment):
     return from_points(segment.start, segment.end)
+
+def is_canonical(line):
+    normal = line.normal
+    return normal.x > 0 or (normal.x == 0 and normal.y >= 0)
+
+def canonical_key(line, tolerance):
+    # The two directions of a line share a key.
+    normal = line.normal
+    offset = line.offset
+    if not is_canonical(line):
+        normal = -normal
+        offset = -offset
+    return (round(normal.x / tolerance), round(normal.y / tolerance), round(offset / tolerance))
@@ -1,3 +1,5 @@
+import math
+
 import geo
 
 def distance_from_point(point0, point1):
@@ -7,5 +9,79 @@ def distance_from_point2(point0, point1):
     return (point1 - point0).magnitude2()
 
 def reflect(point, line):
-    offset = line.normal * (line.normal * point.vector() - line.offset)
-    return point - offset * 2
\ No newline at end of file
+    normal = line.normal
+    distance = 2 * (point.x * normal.x + point.y * normal.y - line.offset)
+    return geo.Point(point.x - normal.x * distance, point.y - normal.y * distance)
+
+class PointTable(object):
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.cell_size = 2 * tolerance
+        self.cells = {}
+        self.size = 0
+
+    def __repr__(self):
+        return 'geoutil.point.PointTable(%s)' % self.tolerance
+
+    def __len__(self):
+        return self.size
+
+    def find(self, point):
+        # The nearest point, so that the result does not depend on the order
+        # the points were added in.
+        x = point.x
+        y = point.y
+        tolerance = self.tolerance
+        cell_size = self.cell_size
+        min_x = math.floor((x - tolerance) / cell_size)
+        max_x = math.floor((x + tolerance) / cell_size)
+        min_y = math.floor((y - tolerance) / cell_size)
+        max_y = math.floor((y + tolerance) / cell_size)
+        nearest = None
+        nearest_distance2 = tolerance * tolerance
+        cells = self.cells
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    for other in cell:
+                        dx = other.x - x
+                        dy = other.y - y
+                        distance2 = dx * dx + dy * dy
+                        if distance2 < nearest_distance2:
+                            nearest = other
+                            nearest_distance2 = distance2
+        return nearest
+
+    def cell_key(self, point):
+        return (math.floor(point.x / self.cell_size), math.floor(point.y / self.cell_size))
+
+    def __contains__(self, point):
+        cell = self.cells.get(self.cell_key(point))
+        return cell is not None and point in cell
+
+    def add(self, point):
+        key = self.cell_key(point)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [point]
+        else:
+            cell.append(point)
+        self.size += 1
+
+    def remove(self, point):
+        key = self.cell_key(point)
+        cell = self.cells[key]
+        cell.remove(point)
+        if not cell:
+            del self.cells[key]
+        self.size -= 1
+
+    def intern(self, point, exclude=()):
+        # Points in exclude are never snapped to, so that two corners of one
+        # polygon cannot become the same point.
+        other = self.find(point)
+        if other is None or other in exclude:
+            self.add(point)
+            return point
+        return other
@@ -4,36 +4,42 @@ import geoutil
 MIN_DISTANCE = .001
 
 def point_parity(point, line):
-    distance = point.vector() * line.normal - line.offset
+    normal = line.normal
+    distance = point.x * normal.x + point.y * normal.y - line.offset
     if abs(distance) < MIN_DISTANCE:
         return 0
     return int(distance / abs(distance))
 
 def split(polygon, line):
+    # Points on the line stay with the side before them, and only the last one
+    # before the other side goes to both, so every edge ends up in one polygon.
     points = ([], [])
     segment_points = []
     segment_idxs = [-1, -1]
     point_mappings = ([], [])
-    last_point = polygon.points[-1]
-    last_parity = point_parity(last_point, line)
+    parities = [point_parity(point, line) for point in polygon.points]
+    last_parity = 0
+    for parity in parities:
+        if parity != 0:
+            last_parity = parity
     point_idx = 0
 
     for point in polygon.points:
-        parity = point_parity(point, line)
+        parity = parities[point_idx]
         if parity == 0:
             idx = 0 if last_parity == -1 else 1
-            segment_idxs[idx] = len(points[idx])
-
-            points[0].append(point)
-            point_mappings[0].append(point_idx)
-            points[1].append(point)
-            point_mappings[1].append(point_idx)
-            segment_points.append(point)
+            points[idx].append(point)
+            point_mappings[idx].append(point_idx)
+            if last_parity != 0 and parities[(point_idx + 1) % len(parities)] == -last_parity:
+                segment_idxs[1 - idx] = len(points[1 - idx])
+                points[1 - idx].append(point)
+                point_mappings[1 - idx].append(point_idx)
+                segment_points.append(point)
         else:
             idx = 0 if parity == -1 else 1
             points[idx].append(point)
             point_mappings[idx].append(point_idx)
-        last_parity = parity
+            last_parity = parity
         point_idx += 1
 
     polygon0 = None
@@ -78,16 +84,87 @@ def intersects_line(polygon, line):
     return False
 
 def test_line(polygon, line):
-    parities = {-1: 0, 0: 0, 1: 0}
+    nx = line.normal.x
+    ny = line.normal.y
+    offset = line.offset
+    below = False
+    above = False
     for point in polygon.points:
-        parity = point_parity(point, line)
-        parities[parity] += 1
-    if parities[-1] == 0:
+        distance = point.x * nx + point.y * ny - offset
+        if distance <= -MIN_DISTANCE:
+            below = True
+        elif distance >= MIN_DISTANCE:
+            above = True
+    if not below:
         return 1
-    if parities[1] == 0:
+    if not above:
         return -1
     return 0
 
 def reflect(polygon, line):
     points = [geoutil.point.reflect(point, line) for point in polygon.points]
     return geo.Polygon(points)
+
+def centroid(polygon):
+    x = sum(point.x for point in polygon.points) / len(polygon.points)
+    y = sum(point.y for point in polygon.points) / len(polygon.points)
+    return geo.Point(x, y)
+
+def signed_area(polygon):
+    area = 0
+    last_point = polygon.points[-1]
+    for point in polygon.points:
+        area += last_point.x * point.y - point.x * last_point.y
+        last_point = point
+    return area / 2
+
+def is_convex(polygon):
+    # Straight corners, as left where an edge was split, still count as convex.
+    orientation = signed_area(polygon)
+    points = polygon.points
+    for idx in range(len(points)):
+        edge0 = points[idx - 1] - points[idx - 2]
+        edge1 = points[idx] - points[idx - 1]
+        cross = edge0.x * edge1.y - edge0.y * edge1.x
+        if cross * orientation < 0 and abs(cross) > MIN_DISTANCE * edge0.magnitude():
+            return False
+    return True
+
+def insert_intersections(polygon, line):
+    points = list(polygon.points)
+    offset = 0
+    for (point, idx) in intersect_line(polygon, line):
+        points.insert(idx + offset, point)
+        offset += 1
+    return geo.Polygon(points)
+
+def edge_lines(polygon):
+    lines = []
+    center = centroid(polygon)
+    last_point = polygon.points[-1]
+    for point in polygon.points:
+        if point == last_point:
+            continue
+        line = geoutil.line.from_points(last_point, point)
+        if center.x * line.normal.x + center.y * line.normal.y < line.offset:
+            line = geo.Line(-line.normal, -line.offset)
+        lines.append(line)
+        last_point = point
+    return lines
+
+def subtract_lines(polygon, lines):
+    pieces = []
+    for line in lines:
+        side = test_line(polygon, line)
+        if side == 1:
+            continue
+        if side == -1:
+            pieces.append(polygon)
+            return pieces
+        (outside, inside, _, _, _) = split(insert_intersections(polygon, line), line)
+        if outside:
+            pieces.append(outside)
+        if not inside:
+            return pieces
+        polygon = inside
+    return pieces
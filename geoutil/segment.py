@@ -1,11 +1,19 @@
 import geoutil
 
-def is_point_within(segment, point):
-    length2 = segment.length2()
+def is_point_within(segment, point, length2=None):
+    if length2 is None:
+        length2 = segment.length2()
     length2a = (point - segment.start).magnitude2()
     length2b = (point - segment.end).magnitude2()
     return (length2a < length2 and length2b < length2)
 
+def intersect(segment0, segment1):
+    point = geoutil.line.intersect(geoutil.line.from_segment(segment0), geoutil.line.from_segment(segment1))
+    if point and is_point_within(segment0, point) and is_point_within(segment1, point):
+        return point
+    else:
+        return None
+
 def intersect_line(segment, line):
     point = geoutil.line.intersect(line, geoutil.line.from_segment(segment))
     if point and is_point_within(segment, point):
@@ -0,0 +1,36 @@
+import geo
+
+IDENTITY = geo.Transform(1, 0, 0, 1, 0, 0)
+
+def reflection(line):
+    normal = line.normal
+    xy = -2 * normal.x * normal.y
+    return geo.Transform(1 - 2 * normal.x * normal.x, xy, xy, 1 - 2 * normal.y * normal.y,
+                         2 * line.offset * normal.x, 2 * line.offset * normal.y)
+
+def compose(transform0, transform1):
+    # transform0 applied after transform1
+    return geo.Transform(transform0.a * transform1.a + transform0.c * transform1.b,
+                         transform0.b * transform1.a + transform0.d * transform1.b,
+                         transform0.a * transform1.c + transform0.c * transform1.d,
+                         transform0.b * transform1.c + transform0.d * transform1.d,
+                         transform0.a * transform1.e + transform0.c * transform1.f + transform0.e,
+                         transform0.b * transform1.e + transform0.d * transform1.f + transform0.f)
+
+def point(transform, point):
+    return geo.Point(transform.a * point.x + transform.c * point.y + transform.e,
+                     transform.b * point.x + transform.d * point.y + transform.f)
+
+def from_points(points0, points1):
+    (p0, p1, p2) = points0
+    (q0, q1, q2) = points1
+    (u, v) = (p1 - p0, p2 - p0)
+    (u1, v1) = (q1 - q0, q2 - q0)
+    det = u.x * v.y - u.y * v.x
+    if det == 0:
+        return None
+    a = (u1.x * v.y - v1.x * u.y) / det
+    b = (u1.y * v.y - v1.y * u.y) / det
+    c = (v1.x * u.x - u1.x * v.x) / det
+    d = (v1.y * u.x - u1.y * v.x) / det
+    return geo.Transform(a, b, c, d, q0.x - a * p0.x - c * p0.y, q0.y - b * p0.x - d * p0.y)
@@ -3,11 +3,20 @@
 from PySide import QtGui
 import sys
 
+import formats
 import window
 
 app = QtGui.QApplication(sys.argv)
 
-window = window.Window()
+sheet = None
+if len(sys.argv) > 1:
+    try:
+        sheet = formats.load(sys.argv[1])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print('%s: %s' % (sys.argv[1], e), file=sys.stderr)
+        sys.exit(1)
+
+window = window.Window(sheet=sheet)
 window.show()
 
 ret = app.exec_()
@@ -1,44 +1,334 @@
+import collections
+import time
+
 import geo
 import geoutil
 
+MAX_FRAGMENTS = 64
+
 class Facet(object):
-    def __init__(self, polygon, parity):
+    def __init__(self, polygon, parity, transform=geoutil.transform.IDENTITY):
         self.polygon = polygon
         self.parity = parity
-        self.neighbors = [None] * len(polygon.points)
+        self.transform = transform
+        self.edge = -1
+        self.layer = None
+        self.segments = None
+        self.cached_box = None
+        self.cached_coords = None
 
     def __repr__(self):
         return 'paper.Facet(%s)' % self.polygon
 
-    def reflect(self, line):
-        return Facet(geoutil.polygon.reflect(self.polygon, line), 1 - self.parity)
+    @property
+    def box(self):
+        if self.cached_box is None:
+            self.cached_box = geoutil.box.from_points(self.polygon.points)
+        return self.cached_box
+
+    @property
+    def coords(self):
+        if self.cached_coords is None:
+            self.cached_coords = geoutil.array.polygon_coords(self.polygon)
+        return self.cached_coords
+
+    def state(self):
+        return (self.polygon, self.parity, self.transform, self.edge, self.layer, self.segments, self.cached_box,
+                self.cached_coords)
+
+    def restore(self, state):
+        (self.polygon, self.parity, self.transform, self.edge, self.layer, self.segments, self.cached_box,
+         self.cached_coords) = state
+
+class HalfEdges(object):
+    # Parallel lists indexed by half-edge: start point in crease pattern
+    # coordinates, next half-edge, twin (-1 on the boundary) and facet.
+    def __init__(self):
+        self.points = []
+        self.next = []
+        self.twin = []
+        self.facet = []
+
+    def __repr__(self):
+        return 'paper.HalfEdges(%s)' % len(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def add(self, point, facet, next_edge=-1, twin=-1):
+        edge = len(self.points)
+        self.points.append(point)
+        self.next.append(next_edge)
+        self.twin.append(twin)
+        self.facet.append(facet)
+        return edge
+
+    def add_loop(self, facet, points):
+        start = len(self.points)
+        count = len(points)
+        for idx in range(count):
+            self.add(points[idx], facet, start + (idx + 1) % count)
+        facet.edge = start
+        return start
+
+    def loop(self, edge):
+        start = edge
+        while True:
+            yield edge
+            edge = self.next[edge]
+            if edge == start:
+                break
+
+    def polygon(self, edge):
+        points = self.points
+        return geo.Polygon([points[loop_edge] for loop_edge in self.loop(edge)])
+
+    def link(self, edge0, edge1):
+        self.twin[edge0] = edge1
+        self.twin[edge1] = edge0
+
+    def split(self, edge, point):
+        # A split of the closing half-edge makes the new point the first one.
+        for half_edge in (edge, self.twin[edge]):
+            if half_edge != -1:
+                facet = self.facet[half_edge]
+                new_edge = self.add(point, facet, self.next[half_edge])
+                if self.next[half_edge] == facet.edge:
+                    facet.edge = new_edge
+                self.next[half_edge] = new_edge
+        twin = self.twin[edge]
+        if twin != -1:
+            self.link(edge, self.next[twin])
+            self.link(self.next[edge], twin)
+        return self.next[edge]
+
+    def state(self, edge):
+        return (self.points[edge], self.next[edge], self.twin[edge], self.facet[edge])
+
+    def restore(self, edge, state):
+        (self.points[edge], self.next[edge], self.twin[edge], self.facet[edge]) = state
+
+    def resize(self, size):
+        extra = size - len(self.points)
+        if extra < 0:
+            for values in (self.points, self.next, self.twin, self.facet):
+                del values[size:]
+        else:
+            for values in (self.points, self.next, self.twin, self.facet):
+                values.extend([None] * extra)
+
+class SegmentGeometry(object):
+    def __init__(self, segment):
+        self.length2 = segment.length2()
+        self.line = geoutil.line.from_segment(segment) if self.length2 > 0 else None
+
+    def __repr__(self):
+        return 'paper.SegmentGeometry(%s)' % self.line
 
 class Layer(object):
     def __init__(self, facets, depth):
         self.facets = facets
         self.depth = depth
+        self.cached_box = None
         for facet in self.facets:
             facet.layer = self
 
     def __repr__(self):
         return 'paper.Layer(%s)' % self.facets
 
+    @property
+    def box(self):
+        if self.cached_box is None:
+            for facet in self.facets:
+                self.cached_box = geoutil.box.union(self.cached_box, facet.box)
+        return self.cached_box
+
     def add_facets(self, facets):
         self.facets.extend(facets)
         for facet in facets:
             facet.layer = self
+        self.cached_box = None
 
     def remove_facet(self, facet):
         self.facets.remove(facet)
 
+    def state(self):
+        return (list(self.facets), self.depth, self.cached_box)
+
+    def restore(self, state):
+        (facets, self.depth, self.cached_box) = state
+        self.facets = list(facets)
+
+class Change(object):
+    def __init__(self, layers, num_edges):
+        self.before = {}
+        self.after = {}
+        self.edges_before = {}
+        self.edges_after = {}
+        self.num_edges_before = num_edges
+        self.num_edges_after = None
+        self.layers_before = list(layers)
+        self.layers_after = None
+        self.removed_geometry = []
+        self.added_geometry = []
+
+    def __repr__(self):
+        return 'paper.Change(%s)' % len(self.before)
+
+    def record(self, obj):
+        if obj not in self.before:
+            self.before[obj] = obj.state()
+
+    def create(self, obj):
+        self.before[obj] = None
+
+    def record_edge(self, edges, edge):
+        # Half-edges added during the change are restored wholesale.
+        if edge < self.num_edges_before and edge not in self.edges_before:
+            self.edges_before[edge] = edges.state(edge)
+
+    def finish(self, layers, edges):
+        for obj in self.before:
+            self.after[obj] = obj.state()
+        for edge in self.edges_before:
+            self.edges_after[edge] = edges.state(edge)
+        for edge in range(self.num_edges_before, len(edges)):
+            self.edges_after[edge] = edges.state(edge)
+        self.num_edges_after = len(edges)
+        self.layers_after = list(layers)
+
+    def empty(self):
+        return not self.after and not self.edges_after
+
+class FoldStats(object):
+    def __init__(self):
+        self.times = collections.OrderedDict()
+        self.facets_visited = 0
+        self.facets_split = 0
+        self.facets_moved = 0
+        self.facets_pruned = 0
+        self.layers_pruned = 0
+        self.layers_created = 0
+        self.last = time.perf_counter()
+
+    def __repr__(self):
+        return 'paper.FoldStats(%s)' % self.total()
+
+    def __str__(self):
+        ret = 'paper.FoldStats: %.3f ms\n' % (self.total() * 1000)
+        for (phase, elapsed) in self.times.items():
+            ret += ' %s: %.3f ms\n' % (phase, elapsed * 1000)
+        ret += ' facets: %d visited, %d split, %d moved, %d pruned\n' % (
+            self.facets_visited, self.facets_split, self.facets_moved, self.facets_pruned)
+        ret += ' layers: %d created, %d pruned\n' % (self.layers_created, self.layers_pruned)
+        return ret
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.times[phase] = self.times.get(phase, 0) + now - self.last
+        self.last = now
+
+    def charge(self, phase, start):
+        elapsed = time.perf_counter() - start
+        self.times[phase] = self.times.get(phase, 0) + elapsed
+        self.last += elapsed
+
+    def total(self):
+        return sum(self.times.values())
+
+class FacetTests(object):
+    # Tests layers top down in doubling blocks, so the layers below where a
+    # fold stops are mostly never tested.
+    def __init__(self, sheet, line, stats=None):
+        self.sheet = sheet
+        self.line = line
+        self.stats = stats
+        self.layers = list(sheet.layers)
+        self.next_idx = len(self.layers) - 1
+        self.min_depth = float('inf')
+        self.block = 4
+        self.results = {}
+
+    def __repr__(self):
+        return 'paper.FacetTests(%s)' % self.line
+
+    def get(self, facet):
+        while facet.layer.depth < self.min_depth and self.next_idx >= 0:
+            self.test_block()
+        return self.results.get(facet, 1)
+
+    def test_block(self):
+        if self.stats:
+            start = time.perf_counter()
+        sheet = self.sheet
+        line = self.line
+        end = max(self.next_idx - self.block, -1)
+        facets = []
+        for idx in range(self.next_idx, end, -1):
+            layer = self.layers[idx]
+            self.min_depth = layer.depth
+            if geoutil.box.test_line(layer.box, line) == 1:
+                sheet.pruned_layers += 1
+                sheet.pruned_facets += len(layer.facets)
+                continue
+            for facet in layer.facets:
+                if geoutil.box.test_line(facet.box, line) == 1:
+                    sheet.pruned_facets += 1
+                else:
+                    facets.append(facet)
+        self.next_idx = end
+        self.block *= 2
+        polygons = geoutil.array.PolygonArray([facet.polygon for facet in facets], [facet.coords for facet in facets])
+        self.results.update(zip(facets, polygons.test_line(line)))
+        if self.stats:
+            self.stats.charge('classify_facets', start)
+
+class FoldCancelled(Exception):
+    pass
+
 class Sheet(object):
-    def __init__(self, polygon):
-        facet = Facet(polygon, 1)
-        layer = Layer([facet], 0)
+    def __init__(self, polygon=None):
+        self.touched_facets = set()
+        self.reflected_points = {}
+        self.pruned_facets = 0
+        self.pruned_layers = 0
+        self.change = None
+        self.profile = None
+        self.progress = None
+        if polygon:
+            point_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
+            for point in polygon.points:
+                point_table.add(point)
+            facet = Facet(polygon, 1)
+            edges = HalfEdges()
+            edges.add_loop(facet, polygon.points)
+            self.set_layers([Layer([facet], 0)], edges, point_table)
+        else:
+            self.set_layers([])
 
-        self.layers = [layer]
-        self.segments = polygon.segments()
-        self.points = polygon.points
+    def set_layers(self, layers, edges=None, point_table=None):
+        # Polygons are refolded unless they come interned in point_table.
+        refold = point_table is None
+        if refold:
+            point_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
+        self.point_table = point_table
+        self.layers = layers
+        self.edges = edges if edges is not None else HalfEdges()
+        self.segment_counts = collections.Counter()
+        self.segment_cache = {}
+        self.stale_segments = set()
+        self.point_counts = collections.Counter()
+        self.stale_points = set()
+        self.history = []
+        self.future = []
+        for layer in layers:
+            for facet in layer.facets:
+                if refold:
+                    facet.polygon = self.folded_polygon(facet)
+                facet.cached_box = None
+                facet.cached_coords = None
+                self.add_facet_geometry(facet)
+        self.renumber_layers()
 
     def __str__(self):
         ret = 'paper.Sheet\n'
@@ -50,128 +340,516 @@ class Sheet(object):
                 ret += '  %s\n' % facet.polygon
         return ret
 
-    def split_facet_edge(self, facet, point, idx):
-        points = facet.polygon.points
-        neighbors = facet.neighbors
-        points.insert(idx, point)
-        facet.neighbors.insert(idx, None)
-        facet.polygon = geo.Polygon(points)
-        for neighbor in neighbors[idx + 1:]:
-            if neighbor:
-                (neighbor_facet, neighbor_idx) = neighbor
-                (neighbor_facet2, neighbor_idx2) = neighbor_facet.neighbors[neighbor_idx]
-                neighbor_facet.neighbors[neighbor_idx] = (neighbor_facet2, neighbor_idx2 + 1)
+    @property
+    def segments(self):
+        return self.segment_counts.keys()
+
+    @property
+    def points(self):
+        return self.point_counts.keys()
+
+    def add_facet_geometry(self, facet):
+        facet.segments = facet.polygon.segments()
+        self.segment_counts.update(facet.segments)
+        self.point_counts.update(facet.polygon.points)
+
+    def remove_facet_geometry(self, facet):
+        for segment in facet.segments:
+            count = self.segment_counts[segment] - 1
+            if count:
+                self.segment_counts[segment] = count
+            else:
+                self.segment_counts.pop(segment)
+                self.stale_segments.add(segment)
+            count = self.point_counts[segment.end] - 1
+            if count:
+                self.point_counts[segment.end] = count
+            else:
+                self.point_counts.pop(segment.end)
+                self.stale_points.add(segment.end)
+
+    def segment_geometry(self, segment):
+        geometry = self.segment_cache.get(segment)
+        if geometry is None:
+            geometry = SegmentGeometry(segment)
+            self.segment_cache[segment] = geometry
+        return geometry
+
+    def prune_segment_geometry(self):
+        # Segments of a touched facet usually come back when it is added again.
+        for segment in self.stale_segments:
+            if segment not in self.segment_counts:
+                self.segment_cache.pop(segment, None)
+        self.stale_segments = set()
+
+    def intern_point(self, point, exclude=()):
+        interned = self.point_table.intern(point, exclude)
+        if interned is point:
+            self.stale_points.add(point)
+        return interned
+
+    def separate_points(self, points, exact):
+        # Corners that snapped to the same point keep their exact position,
+        # except for the one nearest to it.
+        points = list(points)
+        kept = set()
+        for idx in sorted(range(len(points)),
+                          key=lambda idx: geoutil.point.distance_from_point2(exact[idx], points[idx])):
+            if points[idx] in kept:
+                points[idx] = self.intern_point(exact[idx], points)
+            kept.add(points[idx])
+        return points
+
+    def restore_points(self, facet):
+        # Points pruned while the facet was gone.
+        for point in facet.polygon.points:
+            if point not in self.point_table:
+                self.point_table.add(point)
+
+    def prune_points(self):
+        # Only the points of live facets stay in the table, so that undone
+        # folds and discarded previews do not change later snapping.
+        for point in self.stale_points:
+            if point not in self.point_counts and point in self.point_table:
+                self.point_table.remove(point)
+        self.stale_points = set()
+
+    def prune_folded_points(self, removed_facets):
+        # Between the lines of one change, so that they snap as they would in
+        # separate folds. Touched facets have their geometry added only at the
+        # end, so their points are kept stale until then.
+        live_points = set()
+        for facet in self.touched_facets:
+            if facet not in removed_facets:
+                live_points.update(facet.polygon.points)
+        stale_points = set()
+        for point in self.stale_points:
+            if point in live_points:
+                stale_points.add(point)
+            elif point not in self.point_counts and point in self.point_table:
+                self.point_table.remove(point)
+        self.stale_points = stale_points
+
+    def record(self, obj):
+        if self.change:
+            self.change.record(obj)
+
+    def create(self, obj):
+        if self.change:
+            self.change.create(obj)
+
+    def record_edge(self, edge):
+        if self.change:
+            self.change.record_edge(self.edges, edge)
+
+    def folded_polygon(self, facet):
+        transform = facet.transform
+        edge_points = self.edges.points
+        exact = [geoutil.transform.point(transform, edge_points[edge]) for edge in self.edges.loop(facet.edge)]
+        points = [self.intern_point(point) for point in exact]
+        if len(set(points)) < len(points):
+            points = self.separate_points(points, exact)
+        return geo.Polygon(points)
+
+    def paper_polygon(self, facet):
+        # In crease pattern coordinates, in the order of the folded polygon.
+        return self.edges.polygon(facet.edge)
+
+    def touch_facet(self, facet):
+        if facet not in self.touched_facets:
+            self.remove_facet_geometry(facet)
+            self.touched_facets.add(facet)
+            if self.change:
+                self.change.removed_geometry.append(facet)
+
+    def split_facet_edge(self, edge, point, folded_point):
+        edges = self.edges
+        inserts = []
+        for half_edge in (edge, edges.twin[edge]):
+            if half_edge != -1:
+                facet = edges.facet[half_edge]
+                self.record(facet)
+                self.touch_facet(facet)
+                self.record_edge(half_edge)
+                idx = 0
+                loop_edge = facet.edge
+                while loop_edge != half_edge:
+                    loop_edge = edges.next[loop_edge]
+                    idx += 1
+                inserts.append((facet, idx))
+        new_edge = edges.split(edge, point)
+        for (facet, idx) in inserts:
+            points = list(facet.polygon.points)
+            points.insert((idx + 1) % len(points), folded_point)
+            facet.polygon = geo.Polygon(points)
+            facet.cached_coords = None
+        return new_edge
 
     def split_facet_edges(self, facet, line):
+        # The crossing divides the folded and crease pattern edges in the same
+        # ratio, so the new point skips the transform.
+        edges = self.edges
+        loop = list(edges.loop(facet.edge))
         polygon_points = facet.polygon.points
-        neighbors = facet.neighbors
-        points = geoutil.polygon.intersect_line(facet.polygon, line)
-        offset = 0
-        for (point, idx) in points:
-            neighbor = facet.neighbors[idx + offset]
-            self.split_facet_edge(facet, point, idx + offset)
-            if neighbor:
-                (neighbor_facet, neighbor_idx) = neighbor
-                self.split_facet_edge(neighbor_facet, point, neighbor_idx)
-                if facet.polygon.points[idx + offset] == neighbor_facet.polygon.points[neighbor_idx]:
-                    facet.neighbors[idx + offset] = (neighbor_facet, neighbor_idx)
-                    facet.neighbors[idx + offset + 1] = (neighbor_facet, neighbor_idx + 1)
-                    neighbor_facet.neighbors[neighbor_idx] = (facet, idx + offset)
-                    neighbor_facet.neighbors[neighbor_idx + 1] = (facet, idx + offset + 1)
-                else:
-                    facet.neighbors[idx + offset] = (neighbor_facet, neighbor_idx + 1)
-                    facet.neighbors[idx + offset + 1] = (neighbor_facet, neighbor_idx)
-                    neighbor_facet.neighbors[neighbor_idx] = (facet, idx + offset + 1)
-                    neighbor_facet.neighbors[neighbor_idx + 1] = (facet, idx + offset)
-            offset += 1
-        facet.polygon = geo.Polygon(polygon_points)
-        facet.neighbors = neighbors
+        for (point, idx) in geoutil.polygon.intersect_line(facet.polygon, line):
+            edge = loop[idx - 1]
+            direction = polygon_points[idx] - polygon_points[idx - 1]
+            t = (point - polygon_points[idx - 1]).dot(direction) / direction.magnitude2()
+            start = edges.points[edge]
+            # Snapping to a corner of either facet on the edge would collapse it.
+            exclude = list(facet.polygon.points)
+            if edges.twin[edge] != -1:
+                exclude.extend(edges.facet[edges.twin[edge]].polygon.points)
+            paper_point = start + (edges.points[edges.next[edge]] - start) * t
+            folded_point = self.intern_point(point, exclude)
+            if folded_point is point and point in exclude:
+                # Both long edges of a sliver can fold onto one segment and
+                # cross the line at the same point.
+                folded_point = self.intern_point(geoutil.transform.point(facet.transform, paper_point), exclude)
+            self.split_facet_edge(edge, paper_point, folded_point)
 
     def split_facet(self, facet, line):
         (polygon0, polygon1, segment, idxs, mappings) = geoutil.polygon.split(facet.polygon, line)
-        facet0 = None
-        facet1 = None
-        if polygon0:
-            facet0 = Facet(polygon0, facet.parity)
-            facet0.neighbors = [facet.neighbors[idx] for idx in mappings[0]]
-        if polygon1:
-            facet1 = Facet(polygon1, facet.parity)
-            facet1.neighbors = [facet.neighbors[idx] for idx in mappings[1]]
-        if facet0 and facet1:
-            facet0.neighbors[idxs[0]] = (facet1, idxs[1])
-            facet1.neighbors[idxs[1]] = (facet0, idxs[0])
-
-        return (facet0, facet1, segment)
+        self.touch_facet(facet)
+        edges = self.edges
+        loop = list(edges.loop(facet.edge))
+        if polygon0 and not polygon1 and len(mappings[0]) == len(loop):
+            self.record(facet)
+            return (facet, None, segment)
+
+        new_facets = [None, None]
+        new_loops = [None, None]
+        claimed = set()
+        for side in (0, 1):
+            polygon = (polygon0, polygon1)[side]
+            if not polygon:
+                continue
+            new_facet = Facet(polygon, facet.parity, facet.transform)
+            self.touched_facets.add(new_facet)
+            self.create(new_facet)
+            mapping = mappings[side]
+            new_loop = []
+            for (idx, next_idx) in zip(mapping, mapping[1:] + mapping[:1]):
+                edge = loop[idx]
+                if next_idx == (idx + 1) % len(loop) and edge not in claimed:
+                    claimed.add(edge)
+                    self.record_edge(edge)
+                    edges.facet[edge] = new_facet
+                else:
+                    edge = edges.add(edges.points[edge], new_facet)
+                new_loop.append(edge)
+            for (edge, next_edge) in zip(new_loop, new_loop[1:] + new_loop[:1]):
+                edges.next[edge] = next_edge
+            new_facet.edge = new_loop[0]
+            new_facets[side] = new_facet
+            new_loops[side] = new_loop
+        if new_facets[0] and new_facets[1]:
+            edges.link(new_loops[0][idxs[0] - 1], new_loops[1][idxs[1] - 1])
+
+        return (new_facets[0], new_facets[1], segment)
+
+    def reflect_point(self, point, line):
+        reflected = self.reflected_points.get(point)
+        if reflected is None:
+            reflected = self.intern_point(geoutil.point.reflect(point, line))
+            self.reflected_points[point] = reflected
+        return reflected
 
     def reflect_facet(self, facet, line):
-        reflected_facet = facet.reflect(line)
-        reflected_facet.neighbors = facet.neighbors
-        for neighbor in reflected_facet.neighbors:
-            if neighbor:
-                (neighbor_facet, neighbor_idx) = neighbor
-                (neighbor_facet2, neighbor_idx2) = neighbor_facet.neighbors[neighbor_idx]
-                neighbor_facet.neighbors[neighbor_idx] = (reflected_facet, neighbor_idx2)
-        return reflected_facet
+        # Reflected points are shared with the neighbors that move too.
+        self.record(facet)
+        facet.transform = geoutil.transform.compose(geoutil.transform.reflection(line), facet.transform)
+        points = [self.reflect_point(point, line) for point in facet.polygon.points]
+        if len(set(points)) < len(points):
+            points = self.separate_points(points, [geoutil.point.reflect(point, line)
+                                                   for point in facet.polygon.points])
+        facet.polygon = geo.Polygon(points)
+        facet.parity = 1 - facet.parity
+        facet.cached_box = None
+        facet.cached_coords = None
+        self.touched_facets.add(facet)
+        return facet
+
+    def visible_facets(self):
+        visible = []
+        covers = []
+        num_covering = 0
+        num_layers = len(self.layers)
+        for (idx, layer) in enumerate(reversed(self.layers)):
+            if self.progress:
+                self.progress(idx, num_layers)
+            for facet in layer.facets:
+                fragments = [facet.polygon]
+                box = facet.box
+                for (cover_box, cover_lines) in covers:
+                    if not geoutil.box.intersects(box, cover_box):
+                        continue
+                    remaining = []
+                    for fragment in fragments:
+                        remaining.extend(geoutil.polygon.subtract_lines(fragment, cover_lines))
+                    fragments = remaining
+                    if not fragments or len(fragments) > MAX_FRAGMENTS:
+                        break
+                if len(fragments) > MAX_FRAGMENTS:
+                    fragments = [facet.polygon]
+                if fragments:
+                    visible.append((facet, fragments))
+            for (facet, fragments) in visible[num_covering:]:
+                # A facet without area would cut a half plane, not a polygon.
+                lines = geoutil.polygon.edge_lines(facet.polygon)
+                if (len(lines) >= 3 and abs(geoutil.polygon.signed_area(facet.polygon)) >
+                        geoutil.polygon.MIN_DISTANCE * geoutil.polygon.MIN_DISTANCE):
+                    covers.append((facet.box, lines))
+            num_covering = len(visible)
+        visible.reverse()
+        return visible
+
+    def facets(self):
+        for layer in self.layers:
+            for facet in layer.facets:
+                yield facet
+
+    def creases(self):
+        # Yields (half-edge, assignment) once per edge, using the FOLD
+        # assignments: B boundary, M mountain, V valley, F flat.
+        edges = self.edges
+        visited = set()
+        for facet in self.facets():
+            visited.add(facet)
+            for edge in edges.loop(facet.edge):
+                twin = edges.twin[edge]
+                if twin == -1:
+                    yield (edge, 'B')
+                elif edges.facet[twin] not in visited:
+                    neighbor_facet = edges.facet[twin]
+                    if neighbor_facet.parity == facet.parity:
+                        yield (edge, 'F')
+                    elif (neighbor_facet.layer.depth > facet.layer.depth) == (facet.parity == 1):
+                        yield (edge, 'V')
+                    else:
+                        yield (edge, 'M')
 
     def renumber_layers(self):
         depth = 0
         for layer in self.layers:
-            layer.depth = depth
+            if layer.depth != depth:
+                self.record(layer)
+                layer.depth = depth
             depth += 1
 
     def fold(self, line):
+        self.fold_many([line])
+
+    def fold_many(self, lines):
+        change = self.fold_change(lines)
+        if change:
+            self.history.append(change)
+            self.future = []
+
+    def fold_change(self, lines):
+        # Returns the change without adding it to the history, or None if nothing
+        # was folded. Renumbering and geometry are brought up to date once.
+        lines = list(lines)
+        if not lines or not self.layers:
+            return None
+        self.pruned_facets = 0
+        self.pruned_layers = 0
+        self.change = Change(self.layers, len(self.edges))
+        removed_facets = set()
+        try:
+            for (idx, line) in enumerate(lines):
+                stats = FoldStats() if self.profile else None
+                self.fold_layers(line, removed_facets, stats)
+                if idx < len(lines) - 1:
+                    self.prune_folded_points(removed_facets)
+                    if stats:
+                        stats.lap('geometry')
+                        self.profile(stats)
+            self.renumber_layers()
+            if stats:
+                stats.lap('renumber_layers')
+            self.report_done()
+            for facet in self.touched_facets:
+                if facet not in removed_facets:
+                    self.add_facet_geometry(facet)
+                    self.change.added_geometry.append(facet)
+            self.touched_facets = set()
+            self.prune_segment_geometry()
+            self.prune_points()
+            if stats:
+                stats.lap('geometry')
+        except BaseException:
+            # FoldCancelled from the progress callback ends up here.
+            self.revert(self.change)
+            self.touched_facets = set()
+            self.reflected_points = {}
+            self.change = None
+            raise
+        change = self.change
+        change.finish(self.layers, self.edges)
+        self.change = None
+        if stats:
+            stats.lap('history')
+            self.profile(stats)
+        if change.empty():
+            return None
+        return change
+
+    def report_done(self):
+        if self.progress:
+            self.progress(len(self.layers), len(self.layers))
+
+    def speculate(self, lines, visit):
+        # The change can be committed later as long as the sheet is left as it was.
+        change = self.fold_change(lines)
+        if change:
+            try:
+                visit(self)
+            finally:
+                self.revert(change)
+        return change
+
+    def commit(self, change):
+        self.apply(change)
+        self.history.append(change)
+        self.future = []
+
+    def fold_layers(self, line, removed_facets, stats=None):
+        (pruned_facets, pruned_layers) = (self.pruned_facets, self.pruned_layers)
+        tests = FacetTests(self, line, stats)
         old_layers = []
         new_layers = []
         active_facets = set()
         started = False
         next_depth = self.layers[-1].depth + 1
-        for layer in reversed(self.layers):
+        num_layers = len(self.layers)
+        for (idx, layer) in enumerate(reversed(self.layers)):
+            if self.progress:
+                self.progress(idx, num_layers)
+            if stats:
+                stats.lap('visit')
+            if geoutil.box.test_line(layer.box, line) == 1:
+                facets = []
+            else:
+                facets = layer.facets
             old_facets = []
             split_facets = []
             new_facets = []
-            for facet in layer.facets:
-                if geoutil.polygon.test_line(facet.polygon, line) != 1:
+            for facet in facets:
+                if stats:
+                    stats.facets_visited += 1
+                if tests.get(facet) != 1:
+                    if stats:
+                        stats.lap('visit')
                     self.split_facet_edges(facet, line)
+                    if stats:
+                        stats.lap('split_facet_edges')
                     (facet0, facet1, segment) = self.split_facet(facet, line)
+                    if stats:
+                        stats.lap('split_facet')
+                        if facet0 and facet1:
+                            stats.facets_split += 1
                     old_facets.append(facet)
+                    if facet is not facet0:
+                        removed_facets.add(facet)
                     if facet1:
                         split_facets.append(facet1)
                     if facet0:
                         new_facets.append(facet0)
                 if facet in active_facets:
                     active_facets.remove(facet)
+            if old_facets:
+                self.record(layer)
             for facet in old_facets:
                 layer.remove_facet(facet)
+            for facet in new_facets:
+                facet.layer = None
             layer.add_facets(split_facets)
             if not layer.facets:
                 old_layers.append(layer)
+            if stats:
+                stats.lap('visit')
             if new_facets:
                 started = True
                 reflected = []
                 for facet in new_facets:
-                    for neighbor in facet.neighbors:
-                        if neighbor:
-                            (neighbor_facet, _) = neighbor
-                            if neighbor_facet.layer.depth <= layer.depth and geoutil.polygon.test_line(neighbor_facet.polygon, line) != 1:
+                    for edge in self.edges.loop(facet.edge):
+                        twin = self.edges.twin[edge]
+                        if twin != -1:
+                            neighbor_facet = self.edges.facet[twin]
+                            if not neighbor_facet.layer or neighbor_facet.layer.depth > layer.depth:
+                                continue
+                            if tests.get(neighbor_facet) != 1:
                                 active_facets.add(neighbor_facet)
+                    if stats:
+                        stats.lap('neighbors')
 
                     facet = self.reflect_facet(facet, line)
                     reflected.append(facet)
-                new_layers.append(Layer(reflected, next_depth))
+                    if stats:
+                        stats.lap('reflect_facet')
+                        stats.facets_moved += 1
+                new_layer = Layer(reflected, next_depth)
+                self.create(new_layer)
+                new_layers.append(new_layer)
                 next_depth += 1
+                if stats:
+                    stats.layers_created += 1
             if started and not active_facets:
                 break
+        if self.progress:
+            self.progress(num_layers, num_layers)
+        if stats:
+            stats.facets_pruned = self.pruned_facets - pruned_facets
+            stats.layers_pruned = self.pruned_layers - pruned_layers
         for layer in old_layers:
             self.layers.remove(layer)
         self.layers.extend(new_layers)
-        self.renumber_layers()
-        segments = set()
-        points = set()
-        for layer in self.layers:
-            for facet in layer.facets:
-                for segment in facet.polygon.segments():
-                    segments.add(segment)
-                    points.add(segment.start)
-                    points.add(segment.end)
-        self.segments = list(segments)
-        self.points = list(points)
+        self.reflected_points = {}
+        if stats:
+            stats.lap('layers')
+
+    def revert(self, change):
+        for facet in change.added_geometry:
+            self.remove_facet_geometry(facet)
+        for (obj, state) in change.before.items():
+            if state:
+                obj.restore(state)
+        for (edge, state) in change.edges_before.items():
+            self.edges.restore(edge, state)
+        self.edges.resize(change.num_edges_before)
+        for facet in change.removed_geometry:
+            self.restore_points(facet)
+            self.add_facet_geometry(facet)
+        self.prune_segment_geometry()
+        self.prune_points()
+        self.layers = list(change.layers_before)
+
+    def undo(self):
+        if not self.history:
+            raise ValueError('nothing to undo')
+        change = self.history.pop()
+        self.revert(change)
+        self.future.append(change)
+
+    def apply(self, change):
+        for facet in change.removed_geometry:
+            self.remove_facet_geometry(facet)
+        for (obj, state) in change.after.items():
+            obj.restore(state)
+        self.edges.resize(change.num_edges_after)
+        for (edge, state) in change.edges_after.items():
+            self.edges.restore(edge, state)
+        for facet in change.added_geometry:
+            self.restore_points(facet)
+            self.add_facet_geometry(facet)
+        self.prune_segment_geometry()
+        self.prune_points()
+        self.layers = list(change.layers_after)
+
+    def redo(self):
+        if not self.future:
+            raise ValueError('nothing to redo')
+        change = self.future.pop()
+        self.apply(change)
+        self.history.append(change)
@@ -0,0 +1,265 @@
+#! /usr/bin/env python
+
+import argparse
+import concurrent.futures
+import os
+import sys
+
+import batch
+import geo
+import geoutil
+import paper
+
+AXIOMS = ['O1', 'O2', 'O3', 'O4', 'O5', 'O7']
+
+DEPTH = 2
+TOLERANCE = .001
+CHUNKS_PER_WORKER = 4
+INTERSECTION_BLOCK = 256
+
+class Node(object):
+    def __init__(self, value, depth, source, args):
+        self.value = value
+        self.depth = depth
+        self.source = source
+        self.args = args
+
+    def __repr__(self):
+        return 'search.Node(%s, %s)' % (self.value, self.source)
+
+def enumerate_lines(task):
+    (axiom, points, lines, point_start, line_start, first, target, tolerance) = task
+    candidates = geoutil.candidates.generate(axiom, points, lines, point_start, line_start, first)
+    if target is not None:
+        candidates = candidates.near(target, tolerance)
+    return [(line, axiom, args) for (line, args) in candidates]
+
+class Search(object):
+    def __init__(self, points, lines, box, tolerance=TOLERANCE, executor=None, num_chunks=1, axioms=AXIOMS):
+        self.box = box
+        self.axioms = axioms
+        self.tolerance = tolerance
+        self.executor = executor
+        self.num_chunks = num_chunks
+        self.point_table = geoutil.point.PointTable(tolerance)
+        self.points = []
+        self.point_nodes = {}
+        self.lines = []
+        self.line_nodes = {}
+        self.line_keys = set()
+        self.target = None
+        self.matches = []
+        self.depth = 0
+        for point in points:
+            self.add_point(point, Node(point, 0, 'initial', ()))
+        for line in lines:
+            self.add_line(line, Node(line, 0, 'initial', ()))
+
+    def __repr__(self):
+        return 'search.Search(%s points, %s lines)' % (len(self.points), len(self.lines))
+
+    def contains_point(self, point):
+        box = self.box
+        tolerance = self.tolerance
+        return (box.min.x - tolerance <= point.x <= box.max.x + tolerance and
+                box.min.y - tolerance <= point.y <= box.max.y + tolerance)
+
+    def add_point(self, point, node):
+        target = self.target
+        if target and geoutil.point.distance_from_point(point, target) <= self.tolerance:
+            self.matches.append(node)
+        if not self.contains_point(point) or self.point_table.find(point) is not None:
+            return False
+        self.point_table.add(point)
+        self.points.append(point)
+        self.point_nodes[point] = node
+        return True
+
+    def contains_line(self, line):
+        box = self.box
+        distances = [x * line.normal.x + y * line.normal.y - line.offset
+                     for x in (box.min.x, box.max.x) for y in (box.min.y, box.max.y)]
+        return min(distances) <= self.tolerance and max(distances) >= -self.tolerance
+
+    def add_line(self, line, node):
+        if not self.contains_line(line):
+            return False
+        key = geoutil.line.canonical_key(line, self.tolerance)
+        if key in self.line_keys:
+            return False
+        self.line_keys.add(key)
+        self.lines.append(line)
+        self.line_nodes[line] = node
+        return True
+
+    def step(self, point_start, line_start, target=None):
+        counts = {'P': len(self.points), 'L': len(self.lines)}
+        tasks = []
+        for axiom in self.axioms:
+            count = counts[geoutil.candidates.AXIOMS[axiom][0][0]]
+            for chunk in range(self.num_chunks):
+                first = (count * chunk // self.num_chunks, count * (chunk + 1) // self.num_chunks)
+                if first[0] < first[1]:
+                    tasks.append((axiom, self.points, self.lines, point_start, line_start, first, target, self.tolerance))
+        if self.executor:
+            results = list(self.executor.map(enumerate_lines, tasks))
+        else:
+            results = [enumerate_lines(task) for task in tasks]
+
+        self.depth += 1
+        objects = {'P': self.points[:], 'L': self.lines[:]}
+        new_line_start = len(self.lines)
+        for chunk_results in results:
+            for (line, name, args) in chunk_results:
+                kinds = geoutil.candidates.AXIOMS[name][0]
+                values = [objects[kind][arg] for (kind, arg) in zip(kinds, args)]
+                self.add_line(line, Node(line, self.depth, name, values))
+
+        if target is None:
+            self.intersect_lines(new_line_start)
+        else:
+            self.intersect_lines_near(new_line_start, target)
+        return new_line_start
+
+    def intersect_lines(self, start):
+        lines = self.lines
+        line_array = geoutil.array.LineArray(lines)
+        for block_start in range(start, len(lines), INTERSECTION_BLOCK):
+            block = lines[block_start:block_start + INTERSECTION_BLOCK]
+            ends = range(block_start, block_start + len(block))
+            for (line_idx, other_idx, point) in line_array.intersect_pairs(block, ends):
+                args = [block[line_idx], lines[other_idx]]
+                self.add_point(point, Node(point, self.depth, 'intersection', args))
+
+    def intersect_lines_near(self, start, target):
+        near = [idx for idx in range(len(self.lines))
+                if geoutil.line.distance_to_point(self.lines[idx], target) <= self.tolerance]
+        for idx in near:
+            if idx < start:
+                continue
+            for other_idx in near:
+                if other_idx >= idx:
+                    break
+                args = [self.lines[idx], self.lines[other_idx]]
+                point = geoutil.line.intersect(*args)
+                if point:
+                    self.add_point(point, Node(point, self.depth, 'intersection', args))
+
+    def num_folds(self, node):
+        return sum(1 for step in self.construction(node) if step.source != 'intersection')
+
+    def best_match(self):
+        if not self.matches:
+            return None
+        target = self.target
+        return min(self.matches, key=lambda node: (
+            self.num_folds(node), geoutil.point.distance_from_point(node.value, target)))
+
+    def run(self, target, depth):
+        self.target = target
+        self.matches = []
+        for point in self.points:
+            if geoutil.point.distance_from_point(point, target) <= self.tolerance:
+                self.matches.append(self.point_nodes[point])
+        point_start = 0
+        line_start = 0
+        node = self.best_match()
+        while node is None and self.depth < depth:
+            next_point_start = len(self.points)
+            if self.depth + 1 == depth:
+                line_start = self.step(point_start, line_start, target)
+            else:
+                line_start = self.step(point_start, line_start)
+            point_start = next_point_start
+            node = self.best_match()
+        return node
+
+    def construction(self, node):
+        steps = []
+        seen = set()
+
+        def visit(node):
+            if id(node) in seen:
+                return
+            seen.add(id(node))
+            for arg in node.args:
+                if isinstance(arg, geo.Point):
+                    visit(self.point_nodes[arg])
+                else:
+                    visit(self.line_nodes[arg])
+            if node.source != 'initial':
+                steps.append(node)
+
+        visit(node)
+        return steps
+
+def format_value(value):
+    if isinstance(value, geo.Point):
+        return '(%.4f, %.4f)' % (value.x, value.y)
+    return '[%.4f, %.4f, %.4f]' % (value.normal.x, value.normal.y, value.offset)
+
+def initial_state(path):
+    if path:
+        model = batch.load_models(path)[0]
+        sheet = paper.Sheet(geo.Polygon(list(model.polygon.points)))
+        sheet.fold_many(model.lines)
+    else:
+        sheet = paper.Sheet(geo.Polygon([batch.parse_point(point) for point in batch.UNIT_SQUARE]))
+    points = list(sheet.points)
+    lines = [sheet.segment_geometry(segment).line for segment in sheet.segments]
+    lines = [line for line in lines if line]
+    box = None
+    for layer in sheet.layers:
+        box = geoutil.box.union(box, layer.box)
+    return (points, lines, box)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search for fold sequences that construct a reference point.')
+    parser.add_argument('x', type=float, help='x coordinate of the target point')
+    parser.add_argument('y', type=float, help='y coordinate of the target point')
+    parser.add_argument('--depth', type=int, default=DEPTH, help='maximum number of fold levels')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='distance at which points and lines coincide')
+    parser.add_argument('--model', metavar='PATH', help='start from the folded state of the first model in a JSON file')
+    parser.add_argument('--axioms', default=','.join(AXIOMS),
+                        help='comma separated axioms to apply; O6 multiplies the work by the number of lines')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    args = parser.parse_args(argv)
+
+    (points, lines, box) = initial_state(args.model)
+    target = geo.Point(args.x, args.y)
+    if args.workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(args.workers)
+    else:
+        executor = None
+    try:
+        axioms = args.axioms.split(',')
+        for axiom in axioms:
+            if axiom not in geoutil.candidates.AXIOMS:
+                parser.error('unknown axiom %s' % axiom)
+        search = Search(points, lines, box, args.tolerance, executor, args.workers * CHUNKS_PER_WORKER, axioms)
+        node = search.run(target, args.depth)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if node is None:
+        print('no construction within depth %d (%d points, %d lines)' % (args.depth, len(search.points), len(search.lines)))
+        return 1
+
+    names = {}
+    folds = 0
+    for step in search.construction(node):
+        arg_names = [names.get(arg, format_value(arg)) for arg in step.args]
+        if step.source == 'intersection':
+            name = 'P%d' % (len(names) - folds + 1)
+        else:
+            folds += 1
+            name = 'L%d' % folds
+        names[step.value] = name
+        print('%s = %s(%s) = %s' % (name, step.source, ', '.join(arg_names), format_value(step.value)))
+    print('depth %d, %d folds, error %.2g' % (
+        node.depth, folds, geoutil.point.distance_from_point(node.value, target)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
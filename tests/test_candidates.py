@@ -0,0 +1,30 @@
+import pytest
+
+import benchmark
+import geo
+import geoutil
+
+numpy = pytest.importorskip('numpy')
+
+def objects():
+    octagon = benchmark.polygon(8)
+    points = octagon.points + [geo.Point(0.1, 0.2), geo.Point(0.9, 0.6)]
+    lines = [geoutil.line.from_points(point, octagon.points[0]) for point in octagon.points[1:]]
+    yield (points, lines)
+    square = benchmark.unit_square()
+    lines = [geoutil.line.from_segment(segment) for segment in square.segments()]
+    # The same edge seen from both sides.
+    lines += [geo.Line(geo.Vector(0.0, -1.0), 0.0), geo.Line(geo.Vector(0.0, 1.0), 0.0)]
+    yield (square.points, lines)
+
+def rounded(candidates):
+    return sorted((args, round(line.normal.x, 9), round(line.normal.y, 9), round(line.offset, 9))
+                  for (line, args) in candidates)
+
+@pytest.mark.parametrize('axiom', sorted(geoutil.candidates.AXIOMS))
+def test_numpy_matches_python(axiom, monkeypatch):
+    for (points, lines) in objects():
+        expected = rounded(geoutil.candidates.generate(axiom, points, lines))
+        with monkeypatch.context() as context:
+            context.setattr(geoutil.candidates, 'numpy', None)
+            assert rounded(geoutil.candidates.generate(axiom, points, lines)) == expected
@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+import benchmark
+import formats
+import geoutil
+import paper
+
+def folded_sheet(seed, folds):
+    sheet = paper.Sheet(benchmark.unit_square())
+    for line in benchmark.random_lines(seed, folds):
+        sheet.fold(line)
+    return sheet
+
+def read_fold(value):
+    return formats.fold.read(io.StringIO(json.dumps(value)))
+
+def distance(polygon0, polygon1):
+    return max((point0 - point1).magnitude() for (point0, point1) in zip(polygon0.points, polygon1.points))
+
+@pytest.mark.parametrize('seed', [0, 13, 29])
+def test_fold_round_trip(seed):
+    sheet = folded_sheet(seed, 12)
+    f = io.StringIO()
+    formats.fold.write(sheet, f)
+    f.seek(0)
+    loaded = formats.fold.read(f)
+    assert len(loaded.layers) == len(sheet.layers)
+    for (layer, loaded_layer) in zip(sheet.layers, loaded.layers):
+        assert len(loaded_layer.facets) == len(layer.facets)
+        for (facet, loaded_facet) in zip(layer.facets, loaded_layer.facets):
+            assert loaded_facet.parity == facet.parity
+            assert distance(loaded_facet.polygon, facet.polygon) < 2 * geoutil.polygon.MIN_DISTANCE
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_svg_crease_pattern_round_trip(seed):
+    sheet = folded_sheet(seed, 4)
+    f = io.StringIO()
+    formats.svg.write_crease_pattern(sheet, f)
+    loaded = formats.svg.read(io.BytesIO(f.getvalue().encode()))
+    area = sum(abs(geoutil.polygon.signed_area(facet.polygon)) for facet in loaded.facets())
+    assert area == pytest.approx(1, abs=1e-6)
+    assert len(list(loaded.facets())) == len(list(sheet.facets()))
+
+SQUARE = [[0, 0], [0, 1], [1, 1], [1, 0]]
+
+def test_face_vertex_out_of_range():
+    with pytest.raises(ValueError):
+        read_fold({'vertices_coords': SQUARE, 'faces_vertices': [[0, 1, 4]]})
+    with pytest.raises(ValueError):
+        read_fold({'vertices_coords': SQUARE, 'faces_vertices': [[0, 1, -1]]})
+
+def test_edge_with_three_faces():
+    coords = SQUARE + [[-1, 0]]
+    with pytest.raises(ValueError):
+        read_fold({'vertices_coords': coords, 'faces_vertices': [[0, 1, 2], [2, 3, 0], [0, 4, 1], [1, 0, 3]]})
+
+def test_overlapping_faces():
+    coords = SQUARE + [[0.5, 0.5]]
+    with pytest.raises(ValueError):
+        read_fold({'vertices_coords': coords, 'faces_vertices': [[0, 1, 2, 3], [0, 4, 1]]})
+
+def test_face_without_area_in_the_folded_form():
+    frame = {'frame_classes': ['foldedForm'], 'vertices_coords': [[0, 0], [0, 1], [0, 1], [0, 0]],
+             '%s:faces_layer' % formats.fold.CREATOR: [0]}
+    with pytest.raises(ValueError):
+        read_fold({'vertices_coords': SQUARE, 'faces_vertices': [[0, 1, 2, 3]], 'file_frames': [frame]})
@@ -0,0 +1,129 @@
+import os
+import random
+
+import pytest
+
+import batch
+import benchmark
+import geo
+import geoutil
+import paper
+
+def polygons(sheet):
+    return [[facet.polygon.points for facet in layer.facets] for layer in sheet.layers]
+
+def folded_sheet(seed, folds):
+    sheet = paper.Sheet(benchmark.unit_square())
+    for line in benchmark.random_lines(seed, folds):
+        sheet.fold(line)
+    return sheet
+
+def edge_distance(lines, point):
+    # Negative outside the polygon the edge lines came from.
+    return min(line.normal.x * point.x + line.normal.y * point.y - line.offset for line in lines)
+
+def test_no_collapsed_corners():
+    for seed in range(20):
+        sheet = folded_sheet(seed, 14)
+        for facet in sheet.facets():
+            assert len(set(facet.polygon.points)) == len(facet.polygon.points)
+
+def test_no_collapsed_slivers():
+    # The long edges of its slivers fold onto the same segments.
+    (model,) = batch.load_models(os.path.join(benchmark.DIRECTORY, 'models', 'regressions.json'))
+    (sheet, _, _) = batch.run_model(model)
+    for facet in sheet.facets():
+        assert len(set(facet.polygon.points)) == len(facet.polygon.points)
+
+def test_point_table_holds_live_points():
+    rng = random.Random(0)
+    sheet = paper.Sheet(benchmark.unit_square())
+    for _ in range(10):
+        sheet.fold(benchmark.random_line(rng, sheet))
+        sheet.speculate([benchmark.random_line(rng, sheet)], lambda sheet: None)
+        if sheet.history:
+            sheet.undo()
+            sheet.redo()
+        assert len(sheet.point_table) == len(sheet.point_counts)
+        assert all(point in sheet.point_table for point in sheet.points)
+
+def test_undone_folds_and_previews_do_not_change_snapping():
+    for seed in range(10):
+        rng = random.Random(seed)
+        lines = benchmark.random_lines(seed, 12)
+        sheet = paper.Sheet(benchmark.unit_square())
+        for line in lines:
+            num_changes = len(sheet.history)
+            sheet.fold(benchmark.random_line(rng, sheet))
+            if len(sheet.history) > num_changes:
+                sheet.undo()
+            sheet.speculate([benchmark.random_line(rng, sheet)], lambda sheet: None)
+            sheet.fold(line)
+        other = paper.Sheet(benchmark.unit_square())
+        for line in lines:
+            other.fold(line)
+        assert polygons(sheet) == polygons(other)
+
+def sheet_state(sheet):
+    return (polygons(sheet), [facet.parity for facet in sheet.facets()],
+            [sheet.paper_polygon(facet).points for facet in sheet.facets()], set(sheet.segments), set(sheet.points))
+
+def test_undo_redo_round_trip():
+    for seed in range(5):
+        sheet = paper.Sheet(benchmark.unit_square())
+        states = [sheet_state(sheet)]
+        for line in benchmark.random_lines(seed, 10):
+            num_changes = len(sheet.history)
+            sheet.fold(line)
+            if len(sheet.history) > num_changes:
+                states.append(sheet_state(sheet))
+        for state in reversed(states[:-1]):
+            sheet.undo()
+            assert sheet_state(sheet) == state
+        with pytest.raises(ValueError):
+            sheet.undo()
+        for state in states[1:]:
+            sheet.redo()
+            assert sheet_state(sheet) == state
+        with pytest.raises(ValueError):
+            sheet.redo()
+
+def test_fold_many_matches_single_folds():
+    for seed in range(0, 30, 3):
+        lines = benchmark.random_lines(seed, 14)
+        sheet = paper.Sheet(benchmark.unit_square())
+        sheet.fold_many(lines)
+        other = folded_sheet(seed, 14)
+        assert polygons(sheet) == polygons(other)
+        assert [facet.parity for facet in sheet.facets()] == [facet.parity for facet in other.facets()]
+        assert len(sheet.history) == 1
+
+def test_fold_empty_sheet():
+    sheet = paper.Sheet()
+    sheet.fold_many(benchmark.random_lines(0, 2))
+    assert not sheet.layers
+    assert not sheet.history
+
+def test_visible_facets_show_the_top_facet():
+    rng = random.Random(0)
+    for seed in range(4, 14):
+        sheet = folded_sheet(seed, 12)
+        facets = [(facet, geoutil.polygon.edge_lines(facet.polygon)) for facet in sheet.facets()]
+        visible = [(facet, [geoutil.polygon.edge_lines(fragment) for fragment in fragments])
+                   for (facet, fragments) in sheet.visible_facets()]
+        box = None
+        for layer in sheet.layers:
+            box = geoutil.box.union(box, layer.box)
+        for _ in range(400):
+            point = geo.Point(rng.uniform(box.min.x, box.max.x), rng.uniform(box.min.y, box.max.y))
+            distances = [(edge_distance(lines, point), facet) for (facet, lines) in facets]
+            # Within MIN_DISTANCE of an edge either side may win.
+            if any(abs(distance) < geoutil.polygon.MIN_DISTANCE for (distance, _) in distances):
+                continue
+            covering = [facet for (distance, facet) in distances if distance > 0]
+            if not covering:
+                continue
+            top = max(covering, key=lambda facet: facet.layer.depth)
+            hits = [facet for (facet, fragments) in visible
+                    if any(edge_distance(lines, point) > 0 for lines in fragments)]
+            assert hits == [top]
@@ -0,0 +1,30 @@
+import geo
+import geoutil
+
+def test_find_returns_nearest_point():
+    table = geoutil.point.PointTable(0.1)
+    far = geo.Point(0.05, 0)
+    near = geo.Point(0.01, 0)
+    table.add(far)
+    table.add(near)
+    assert table.find(geo.Point(0, 0)) is near
+    assert table.find(geo.Point(0.5, 0)) is None
+
+def test_intern_skips_excluded_points():
+    table = geoutil.point.PointTable(0.1)
+    point = geo.Point(0, 0)
+    table.add(point)
+    other = geo.Point(0.01, 0)
+    assert table.intern(other) is point
+    assert table.intern(other, [point]) is other
+    assert len(table) == 2
+
+def test_remove():
+    table = geoutil.point.PointTable(0.1)
+    point = geo.Point(0, 0)
+    table.add(point)
+    assert point in table
+    table.remove(point)
+    assert point not in table
+    assert table.find(point) is None
+    assert len(table) == 0
@@ -0,0 +1,61 @@
+import struct
+
+import pytest
+
+import benchmark
+import formats
+import paper
+
+def polygons(sheet):
+    return [[facet.polygon.points for facet in layer.facets] for layer in sheet.layers]
+
+def folded_sheet(seed, folds):
+    sheet = paper.Sheet(benchmark.unit_square())
+    for line in benchmark.random_lines(seed, folds):
+        sheet.fold(line)
+    return sheet
+
+@pytest.mark.parametrize('seed', [11, 12, 31])
+def test_reloaded_sheet_refolds_exactly(seed, tmp_path):
+    path = str(tmp_path / 'sheet.snapshot')
+    lines = benchmark.random_lines(seed, 15)
+    sheet = paper.Sheet(benchmark.unit_square())
+    for line in lines[:-1]:
+        sheet.fold(line)
+    formats.snapshot.save(sheet, path)
+    loaded = formats.snapshot.load(path)
+    assert polygons(loaded) == polygons(sheet)
+    assert [facet.parity for facet in loaded.facets()] == [facet.parity for facet in sheet.facets()]
+    sheet.fold(lines[-1])
+    loaded.fold(lines[-1])
+    assert polygons(loaded) == polygons(sheet)
+
+def corrupt(path, section, value):
+    # Overwrites the first entry of a section of a saved snapshot.
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    (_, _, num_points, num_folded_points, num_facets, _, _) = formats.snapshot.HEADER.unpack_from(data)
+    offset = formats.snapshot.HEADER.size + 16 * (num_points + num_folded_points) + 48 * num_facets
+    if section == 'facet_points':
+        offset += 4 * (num_facets + 1)
+    struct.pack_into('<I', data, offset, value)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+@pytest.mark.parametrize('section', ['facet_starts', 'facet_points'])
+def test_indices_out_of_range(section, tmp_path):
+    path = str(tmp_path / 'sheet.snapshot')
+    formats.snapshot.save(folded_sheet(0, 4), path)
+    corrupt(path, section, 1 << 20)
+    with pytest.raises(ValueError):
+        formats.snapshot.load(path)
+
+def test_truncated(tmp_path):
+    path = str(tmp_path / 'sheet.snapshot')
+    formats.snapshot.save(folded_sheet(0, 4), path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-1])
+    with pytest.raises(ValueError):
+        formats.snapshot.load(path)
@@ -1,16 +1,37 @@
+import collections
+
 from PySide import QtCore, QtGui
 from PySide.QtCore import Qt
 
 from window_ui import Ui_MainWindow
 
+import formats
+import formats.fold
+import formats.snapshot
+import formats.svg
 import geo
+import geoutil.array
+import geoutil.grid
 import geoutil.huzita_justin
 import geoutil.line
+import geoutil.point
+import geoutil.polygon
 import paper
 
+SNAPSHOT_FILTER = 'Sheet snapshots (*.sheet)'
+OPEN_FILTER = 'Sheets and crease patterns (*.sheet *.fold *.svg)'
+FOLDED_SVG_FILTER = 'Folded state (*.svg)'
+CREASE_PATTERN_SVG_FILTER = 'Crease pattern (*.svg)'
+FOLD_FILTER = 'FOLD files (*.fold)'
 SELECTION_THRESHOLD = 10
+INDEX_CELL_SIZE = 0.02
 MARGIN = 10
 ZOOM_INCREMENT = 1.25
+TILE_SIZE = 256
+MAX_TILES = 64
+MAX_PREVIEWS = 8
+PROGRESS_DELAY = 500
+HOVER_DELAY = 400
 
 EDGE_COLOR = QtGui.QColor(0, 0, 0)
 PAPER_COLORS = [QtGui.QColor(0xFF, 0xFF, 0xFF), QtGui.QColor(0xFF, 0xFF, 0x80)]
@@ -24,8 +45,58 @@ LINE_WIDTH = 2
 LINE_WIDTH_SELECTED = 3
 POINT_SIZE = 3
 
+def visible_facets(sheet):
+    # Copied so that tiles can be drawn while a worker has the sheet.
+    return [(facet.box, facet.polygon, facet.parity, fragments) for (facet, fragments) in sheet.visible_facets()]
+
+def preview_key(line):
+    return (geoutil.line.canonical_key(line, geoutil.polygon.MIN_DISTANCE), geoutil.line.is_canonical(line))
+
+class FoldThread(QtCore.QThread):
+    # The window leaves the sheet alone until finished is emitted.
+    progress = QtCore.Signal(int, int)
+
+    def __init__(self, sheet, line, parent=None):
+        super(FoldThread, self).__init__(parent)
+        self.sheet = sheet
+        self.line = line
+        self.cancel_requested = False
+        self.cancelled = False
+
+    def run(self):
+        self.sheet.progress = self.report_progress
+        try:
+            self.fold()
+        except paper.FoldCancelled:
+            self.cancelled = True
+        finally:
+            self.sheet.progress = None
+
+    def fold(self):
+        self.sheet.fold(self.line)
+
+    def report_progress(self, done, total):
+        if self.cancel_requested:
+            raise paper.FoldCancelled()
+        self.progress.emit(done, total)
+
+    def cancel(self):
+        self.cancel_requested = True
+
+class PreviewThread(FoldThread):
+    def __init__(self, sheet, line, parent=None):
+        super(PreviewThread, self).__init__(sheet, line, parent)
+        self.change = None
+        self.visible_facets = None
+
+    def fold(self):
+        self.change = self.sheet.speculate([self.line], self.capture)
+
+    def capture(self, sheet):
+        self.visible_facets = visible_facets(sheet)
+
 class Window(QtGui.QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, sheet=None):
         super(Window, self).__init__(parent)
 
         self.ui = Ui_MainWindow()
@@ -36,6 +107,9 @@ class Window(QtGui.QMainWindow):
         self.ui.canvas.mouseMoveEvent = self.on_canvas_mouse_move_event
         self.ui.scrollArea.resizeEvent = self.on_scroll_area_resize_event
 
+        self.ui.actionOpen.triggered.connect(self.on_action_open)
+        self.ui.actionSave.triggered.connect(self.on_action_save)
+        self.ui.actionExport.triggered.connect(self.on_action_export)
         self.ui.actionZoomIn.triggered.connect(self.on_action_zoom_in)
         self.ui.actionZoomOut.triggered.connect(self.on_action_zoom_out)
         self.ui.actionPoints.triggered.connect(self.on_action_points)
@@ -43,24 +117,67 @@ class Window(QtGui.QMainWindow):
         self.ui.actionLineLine.triggered.connect(self.on_action_line_line)
         self.ui.actionLinePoint.triggered.connect(self.on_action_line_point)
         self.ui.actionPointPointLine.triggered.connect(self.on_action_point_point_line)
+        self.ui.actionPointLinePointLine.triggered.connect(self.on_action_point_line_point_line)
         self.ui.actionLinePointLine.triggered.connect(self.on_action_line_point_line)
         self.ui.actionValleyFold.triggered.connect(self.on_action_valley_fold)
         self.ui.actionExecuteFold.triggered.connect(self.on_action_execute_fold)
+        self.ui.actionUndo.triggered.connect(self.on_action_undo)
+        self.ui.actionRedo.triggered.connect(self.on_action_redo)
 
         self.ui.canvas.setMouseTracking(True)
 
+        self.hover_timer = QtCore.QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(HOVER_DELAY)
+        self.hover_timer.timeout.connect(self.on_hover_timeout)
+
         self.zoom = 1
 
-        points = [geo.Point(0, 0), geo.Point(0, 1), geo.Point(1, 1), geo.Point(1, 0)]
-        polygon = geo.Polygon(points)
-        self.sheet = paper.Sheet(polygon)
+        if sheet is None:
+            points = [geo.Point(0, 0), geo.Point(0, 1), geo.Point(1, 1), geo.Point(1, 0)]
+            polygon = geo.Polygon(points)
+            sheet = paper.Sheet(polygon)
+        self.sheet = sheet
         self.highlight = None
+        self.hover_line = None
         self.selected = []
         self.lines = []
         self.intersections = []
+        self.intersection_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
         self.fold = None
+        self.fold_thread = None
+        self.progress_dialog = None
+        self.previews = collections.OrderedDict()
+        self.preview_lines = []
+        self.preview_thread = None
+        self.tiles = collections.OrderedDict()
+        self.visible_facets = None
+        self.rebuild_index()
         self.update_actions()
 
+    def closeEvent(self, event):
+        for thread in (self.fold_thread, self.preview_thread):
+            if thread:
+                thread.cancel()
+                thread.wait()
+        super(Window, self).closeEvent(event)
+
+    def rebuild_index(self):
+        self.point_index = geoutil.grid.Grid(INDEX_CELL_SIZE)
+        for point in self.sheet.points:
+            self.point_index.insert_point(point, point)
+
+        self.segment_array = geoutil.array.SegmentArray(list(self.sheet.segments))
+        self.segment_index = geoutil.grid.Grid(INDEX_CELL_SIZE)
+        self.segment_geometries = {}
+        for segment in self.sheet.segments:
+            self.segment_index.insert_segment(segment, segment)
+            self.segment_geometries[segment] = self.sheet.segment_geometry(segment)
+
+        self.intersection_index = geoutil.grid.Grid(INDEX_CELL_SIZE)
+        for point in self.intersections:
+            self.intersection_index.insert_point(point, point)
+
     def canvas_size(self):
         return min(self.ui.scrollArea.width(), self.ui.scrollArea.height()) * self.zoom
 
@@ -78,26 +195,30 @@ class Window(QtGui.QMainWindow):
     def find_point_near(self, mouse_point):
         threshold = self.selection_threshold()
 
-        for point in self.sheet.points:
-            distance2 = (mouse_point - point).magnitude2()
-            if distance2 <= threshold * threshold:
-                return point
-
-        for point in self.intersections:
-            distance2 = (mouse_point - point).magnitude2()
-            if distance2 <= threshold * threshold:
-                return point
+        for index in (self.point_index, self.intersection_index):
+            found_point = None
+            found_distance2 = threshold * threshold
+            for point in index.query(mouse_point, threshold):
+                distance2 = (mouse_point - point).magnitude2()
+                if distance2 <= found_distance2:
+                    found_point = point
+                    found_distance2 = distance2
+            if found_point:
+                return found_point
 
         return None
 
     def find_line_near(self, mouse_point):
         found_line = None
-        threshold = self.selection_threshold()
-        for segment in self.sheet.segments:
-            line = geoutil.line.from_segment(segment)
-            if geoutil.line.distance_to_point(line, mouse_point) <= threshold and geoutil.segment.is_point_within(segment, mouse_point):
-                found_line = line
-                break
+        found_distance = threshold = self.selection_threshold()
+        for segment in self.segment_index.query(mouse_point, threshold):
+            geometry = self.segment_geometries[segment]
+            if geometry.line is None:
+                continue
+            distance = geoutil.line.distance_to_point(geometry.line, mouse_point)
+            if distance <= found_distance and geoutil.segment.is_point_within(segment, mouse_point, geometry.length2):
+                found_line = geometry.line
+                found_distance = distance
 
         if not found_line:
             for line in self.lines:
@@ -107,8 +228,77 @@ class Window(QtGui.QMainWindow):
 
         return found_line
 
+    def render_tile(self, visible, x, y):
+        pixmap = QtGui.QPixmap(TILE_SIZE, TILE_SIZE)
+        pixmap.fill(Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.translate(-x * TILE_SIZE, -y * TILE_SIZE)
+
+        margin = QtCore.QPoint(LINE_WIDTH, LINE_WIDTH)
+        min = self.window_to_point(QtCore.QPoint(x * TILE_SIZE, y * TILE_SIZE) - margin)
+        max = self.window_to_point(QtCore.QPoint((x + 1) * TILE_SIZE, (y + 1) * TILE_SIZE) + margin)
+
+        pen = QtGui.QPen(EDGE_COLOR, LINE_WIDTH, Qt.SolidLine, Qt.SquareCap, Qt.MiterJoin)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        for (box, polygon, parity, fragments) in visible:
+            if box.max.x < min.x or box.min.x > max.x or box.max.y < min.y or box.min.y > max.y:
+                continue
+            path = QtGui.QPainterPath()
+            path.setFillRule(Qt.WindingFill)
+            for fragment in fragments:
+                fragment_polygon = QtGui.QPolygon([self.point_to_window(point) for point in fragment.points])
+                path.addPolygon(QtGui.QPolygonF(fragment_polygon))
+                path.closeSubpath()
+            painter.fillPath(path, QtGui.QBrush(PAPER_COLORS[parity]))
+            painter.drawPolygon([self.point_to_window(point) for point in polygon.points])
+
+        painter.end()
+        return pixmap
+
+    def previewed_line(self):
+        if self.fold:
+            return self.fold
+        if self.hover_line is not None and self.hover_line == self.highlight:
+            return self.hover_line
+        return None
+
+    def shown_preview(self):
+        line = self.previewed_line()
+        if line is not None:
+            key = preview_key(line)
+            if key in self.previews:
+                return key
+        return None
+
+    def tile(self, x, y):
+        shown = self.shown_preview()
+        key = (self.canvas_size(), shown, x, y)
+        pixmap = self.tiles.pop(key, None)
+        if pixmap is None:
+            if shown:
+                visible = self.previews[shown][1]
+            else:
+                if self.visible_facets is None:
+                    if self.fold_thread or self.preview_thread:
+                        return None
+                    self.visible_facets = visible_facets(self.sheet)
+                visible = self.visible_facets
+            pixmap = self.render_tile(visible, x, y)
+            while len(self.tiles) >= MAX_TILES:
+                self.tiles.popitem(last=False)
+        self.tiles[key] = pixmap
+        return pixmap
+
     def on_canvas_paint_event(self, event):
+        rect = event.rect()
         painter = QtGui.QPainter(self.ui.canvas)
+        for x in range(rect.left() // TILE_SIZE, rect.right() // TILE_SIZE + 1):
+            for y in range(rect.top() // TILE_SIZE, rect.bottom() // TILE_SIZE + 1):
+                pixmap = self.tile(x, y)
+                if pixmap:
+                    painter.drawPixmap(x * TILE_SIZE, y * TILE_SIZE, pixmap)
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
 
         def draw_segment(segment):
@@ -119,8 +309,8 @@ class Window(QtGui.QMainWindow):
             painter.drawEllipse(self.point_to_window(point), POINT_SIZE, POINT_SIZE)
 
         def draw_line(line):
-            min = self.window_to_point(QtCore.QPoint(0, 0))
-            max = self.window_to_point(QtCore.QPoint(self.ui.canvas.width(), self.ui.canvas.height()))
+            min = self.window_to_point(rect.topLeft())
+            max = self.window_to_point(rect.bottomRight())
             if abs(line.normal.x) > abs(line.normal.y):
                 minline = geoutil.line.from_point_normal(min, geo.Vector(0, 1))
                 maxline = geoutil.line.from_point_normal(max, geo.Vector(0, -1))
@@ -134,18 +324,6 @@ class Window(QtGui.QMainWindow):
             draw_points = [self.point_to_window(point) for point in points]
             painter.drawLine(*draw_points)
 
-        def draw_polygon(polygon):
-            draw_points = [self.point_to_window(point) for point in polygon.points]
-            painter.drawPolygon(draw_points)
-
-        pen = QtGui.QPen(EDGE_COLOR, LINE_WIDTH, Qt.SolidLine, Qt.SquareCap, Qt.MiterJoin)
-        painter.setPen(pen)
-        for layer in self.sheet.layers:
-            for facet in layer.facets:
-                brush = QtGui.QBrush(PAPER_COLORS[facet.parity])
-                painter.setBrush(brush)
-                draw_polygon(facet.polygon)
-
         highlight = self.highlight
         if highlight:
             if highlight in self.selected or self.num_selected(type(highlight)) == 2:
@@ -211,6 +389,9 @@ class Window(QtGui.QMainWindow):
         return count
 
     def on_canvas_mouse_release_event(self, event):
+        if self.fold_thread:
+            return
+
         mouse_point = self.window_to_point(event.pos())
         found = False
 
@@ -220,6 +401,7 @@ class Window(QtGui.QMainWindow):
             threshold = self.selection_threshold()
             if (mouse_point - point).magnitude2() < threshold * threshold:
                 self.fold = geo.Line(-self.fold.normal, -self.fold.offset)
+                self.request_previews([self.fold, geo.Line(-self.fold.normal, -self.fold.offset)])
                 found = True
 
         if not found:
@@ -237,6 +419,9 @@ class Window(QtGui.QMainWindow):
         self.update_actions()
 
     def on_canvas_mouse_move_event(self, event):
+        if self.fold_thread:
+            return
+
         mouse_point = self.window_to_point(event.pos())
         highlight = self.find_point_near(mouse_point)
         if not highlight:
@@ -244,6 +429,18 @@ class Window(QtGui.QMainWindow):
 
         if highlight != self.highlight:
             self.highlight = highlight
+            self.hover_line = None
+            self.hover_timer.stop()
+            if not self.fold:
+                self.request_previews([])
+                if isinstance(highlight, geo.Line):
+                    self.hover_timer.start()
+            self.ui.canvas.update()
+
+    def on_hover_timeout(self):
+        if isinstance(self.highlight, geo.Line) and not self.fold and not self.fold_thread:
+            self.hover_line = self.highlight
+            self.request_previews([self.hover_line])
             self.ui.canvas.update()
 
     def on_scroll_area_resize_event(self, event):
@@ -274,26 +471,35 @@ class Window(QtGui.QMainWindow):
         self.ui.actionLineLine.setEnabled(self.num_selected(geo.Point) == 0 and self.num_selected(geo.Line) == 2)
         self.ui.actionLinePoint.setEnabled(self.num_selected(geo.Point) == 1 and self.num_selected(geo.Line) == 1)
         self.ui.actionPointPointLine.setEnabled(self.num_selected(geo.Point) == 2 and self.num_selected(geo.Line) == 1)
+        self.ui.actionPointLinePointLine.setEnabled(self.num_selected(geo.Point) == 2 and self.num_selected(geo.Line) == 2)
         self.ui.actionLinePointLine.setEnabled(self.num_selected(geo.Point) == 1 and self.num_selected(geo.Line) == 2)
         self.ui.actionValleyFold.setEnabled(self.num_selected(geo.Point) == 0 and self.num_selected(geo.Line) == 1 and not self.fold)
         self.ui.actionExecuteFold.setEnabled(self.fold is not None)
+        self.ui.actionUndo.setEnabled(bool(self.sheet.history))
+        self.ui.actionRedo.setEnabled(bool(self.sheet.future))
+        if self.fold_thread:
+            for action in self.ui.toolBar.actions():
+                action.setEnabled(False)
 
     def add_lines(self, lines):
-        for line in lines:
-            for segment in self.sheet.segments:
-                point = geoutil.segment.intersect_line(segment, line)
-                if point:
-                    self.intersections.append(point)
+        for point in self.segment_array.intersect_lines(lines):
+            self.add_intersection(point)
 
-            for other_line in self.lines:
-                point = geoutil.line.intersect(line, other_line)
-                if point:
-                    self.intersections.append(point)
+        ends = range(len(self.lines), len(self.lines) + len(lines))
+        line_array = geoutil.array.LineArray(self.lines + lines)
+        for point in line_array.intersect_lines(lines, ends):
+            self.add_intersection(point)
 
         self.lines.extend(lines)
         self.update_actions()
         self.ui.canvas.update()
 
+    def add_intersection(self, point):
+        if self.intersection_table.find(point) is None:
+            self.intersection_table.add(point)
+            self.intersections.append(point)
+            self.intersection_index.insert_point(point, point)
+
     def add_line(self, line):
         self.add_lines([line])
 
@@ -345,6 +551,20 @@ class Window(QtGui.QMainWindow):
             self.selected.clear()
             self.add_lines(lines)
 
+    def on_action_point_line_point_line(self):
+        points = []
+        lines = []
+        for selected in self.selected:
+            if isinstance(selected, geo.Point):
+                points.append(selected)
+            elif isinstance(selected, geo.Line):
+                lines.append(selected)
+
+        lines = geoutil.huzita_justin.O6(points[0], points[1], lines[0], lines[1])
+        if lines:
+            self.selected.clear()
+            self.add_lines(lines)
+
     def on_action_line_point_line(self):
         lines = []
         for selected in self.selected:
@@ -362,13 +582,179 @@ class Window(QtGui.QMainWindow):
         self.fold = self.selected[0]
         self.lines = []
         self.intersections = []
+        self.intersection_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
+        self.intersection_index = geoutil.grid.Grid(INDEX_CELL_SIZE)
         self.selected.clear()
         self.highlighted = None
+        self.request_previews([self.fold, geo.Line(-self.fold.normal, -self.fold.offset)])
         self.update_actions()
         self.ui.canvas.update()
 
+    def request_previews(self, lines):
+        keys = [preview_key(line) for line in lines]
+        self.preview_lines = [line for (line, key) in zip(lines, keys) if key not in self.previews]
+        thread = self.preview_thread
+        if thread is None:
+            self.start_preview()
+        elif thread is not self.fold_thread and preview_key(thread.line) not in keys:
+            thread.cancel()
+
+    def start_preview(self):
+        while self.preview_lines:
+            line = self.preview_lines.pop(0)
+            if preview_key(line) in self.previews:
+                continue
+            self.preview_thread = PreviewThread(self.sheet, line, self)
+            self.preview_thread.finished.connect(self.on_preview_finished)
+            self.preview_thread.start()
+            break
+
+    def finish_preview(self, thread):
+        self.preview_thread = None
+        if thread.change:
+            self.previews[preview_key(thread.line)] = (thread.change, thread.visible_facets)
+            while len(self.previews) > MAX_PREVIEWS:
+                self.previews.popitem(last=False)
+            line = self.previewed_line()
+            if line is not None and preview_key(line) == preview_key(thread.line):
+                self.ui.canvas.update()
+
+    def stop_previews(self):
+        # The worker stops at its next progress call.
+        self.preview_lines = []
+        thread = self.preview_thread
+        if thread and thread is not self.fold_thread:
+            thread.cancel()
+            thread.wait()
+            self.finish_preview(thread)
+
+    def on_preview_finished(self):
+        # A preview stopped from the GUI thread has already been handled.
+        thread = self.sender()
+        if thread is not self.preview_thread:
+            return
+        thread.wait()
+        self.finish_preview(thread)
+        if thread is self.fold_thread:
+            self.on_fold_finished()
+        else:
+            self.start_preview()
+
     def on_action_execute_fold(self):
-        self.sheet.fold(self.fold)
+        key = preview_key(self.fold)
+        if key in self.previews:
+            (change, visible) = self.previews[key]
+            self.stop_previews()
+            self.sheet.commit(change)
+            self.fold = None
+            self.sheet_changed()
+            self.visible_facets = visible
+            return
+
+        # A running preview of this fold is committed when it finishes.
+        self.preview_lines = []
+        thread = self.preview_thread
+        if thread and not thread.cancel_requested and preview_key(thread.line) == key:
+            self.fold_thread = thread
+        else:
+            self.stop_previews()
+            self.fold_thread = FoldThread(self.sheet, self.fold, self)
+            self.fold_thread.finished.connect(self.on_fold_finished)
+        self.fold_thread.progress.connect(self.on_fold_progress)
+
+        self.progress_dialog = QtGui.QProgressDialog('Folding...', 'Cancel', 0, 0, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(PROGRESS_DELAY)
+        self.progress_dialog.canceled.connect(self.fold_thread.cancel)
+
+        self.highlight = None
+        self.update_actions()
+        if self.fold_thread is not self.preview_thread:
+            self.fold_thread.start()
+
+    def on_fold_progress(self, done, total):
+        if self.progress_dialog:
+            self.progress_dialog.setMaximum(total)
+            self.progress_dialog.setValue(done)
+
+    def on_fold_finished(self):
+        thread = self.fold_thread
+        self.fold_thread = None
+        self.progress_dialog.close()
+        self.progress_dialog = None
+        visible = None
+        if isinstance(thread, PreviewThread) and thread.change:
+            self.sheet.commit(thread.change)
+            visible = thread.visible_facets
+        if not thread.cancelled:
+            self.fold = None
+        self.sheet_changed()
+        self.visible_facets = visible
+
+    def on_action_open(self):
+        (path, _) = QtGui.QFileDialog.getOpenFileName(self, 'Open', '', OPEN_FILTER)
+        if not path:
+            return
+
+        try:
+            sheet = formats.load(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            QtGui.QMessageBox.warning(self, 'Open', '%s: %s' % (path, e))
+            return
+
+        self.stop_previews()
+        self.sheet = sheet
+        self.lines = []
+        self.intersections = []
+        self.intersection_table = geoutil.point.PointTable(geoutil.polygon.MIN_DISTANCE)
         self.fold = None
+        self.sheet_changed()
+
+    def on_action_save(self):
+        (path, _) = QtGui.QFileDialog.getSaveFileName(self, 'Save', '', SNAPSHOT_FILTER)
+        if not path:
+            return
+
+        self.stop_previews()
+        try:
+            formats.snapshot.save(self.sheet, path)
+        except OSError as e:
+            QtGui.QMessageBox.warning(self, 'Save', '%s: %s' % (path, e))
+
+    def on_action_export(self):
+        filters = ';;'.join((FOLDED_SVG_FILTER, CREASE_PATTERN_SVG_FILTER, FOLD_FILTER))
+        (path, selected_filter) = QtGui.QFileDialog.getSaveFileName(self, 'Export', '', filters)
+        if not path:
+            return
+
+        self.stop_previews()
+        try:
+            if selected_filter == FOLD_FILTER:
+                formats.fold.save(self.sheet, path)
+            else:
+                formats.svg.save(self.sheet, path, selected_filter == CREASE_PATTERN_SVG_FILTER)
+        except OSError as e:
+            QtGui.QMessageBox.warning(self, 'Export', '%s: %s' % (path, e))
+
+    def on_action_undo(self):
+        self.stop_previews()
+        self.sheet.undo()
+        self.sheet_changed()
+
+    def on_action_redo(self):
+        self.stop_previews()
+        self.sheet.redo()
+        self.sheet_changed()
+
+    def sheet_changed(self):
+        self.tiles.clear()
+        self.visible_facets = None
+        self.previews.clear()
+        self.preview_lines = []
+        self.selected.clear()
+        self.highlight = None
+        self.hover_line = None
+        self.hover_timer.stop()
+        self.rebuild_index()
         self.update_actions()
-        self.ui.canvas.update()
\ No newline at end of file
+        self.ui.canvas.update()
@@ -39,6 +39,12 @@ class Ui_MainWindow(object):
         self.toolBar = QtGui.QToolBar(MainWindow)
         self.toolBar.setObjectName("toolBar")
         MainWindow.addToolBar(QtCore.Qt.TopToolBarArea, self.toolBar)
+        self.actionOpen = QtGui.QAction(MainWindow)
+        self.actionOpen.setObjectName("actionOpen")
+        self.actionSave = QtGui.QAction(MainWindow)
+        self.actionSave.setObjectName("actionSave")
+        self.actionExport = QtGui.QAction(MainWindow)
+        self.actionExport.setObjectName("actionExport")
         self.actionZoomIn = QtGui.QAction(MainWindow)
         self.actionZoomIn.setObjectName("actionZoomIn")
         self.actionZoomOut = QtGui.QAction(MainWindow)
@@ -55,10 +61,20 @@ class Ui_MainWindow(object):
         self.actionLinePointLine.setObjectName("actionLinePointLine")
         self.actionPointPointLine = QtGui.QAction(MainWindow)
         self.actionPointPointLine.setObjectName("actionPointPointLine")
+        self.actionPointLinePointLine = QtGui.QAction(MainWindow)
+        self.actionPointLinePointLine.setObjectName("actionPointLinePointLine")
         self.actionValleyFold = QtGui.QAction(MainWindow)
         self.actionValleyFold.setObjectName("actionValleyFold")
         self.actionExecuteFold = QtGui.QAction(MainWindow)
         self.actionExecuteFold.setObjectName("actionExecuteFold")
+        self.actionUndo = QtGui.QAction(MainWindow)
+        self.actionUndo.setObjectName("actionUndo")
+        self.actionRedo = QtGui.QAction(MainWindow)
+        self.actionRedo.setObjectName("actionRedo")
+        self.toolBar.addAction(self.actionOpen)
+        self.toolBar.addAction(self.actionSave)
+        self.toolBar.addAction(self.actionExport)
+        self.toolBar.addSeparator()
         self.toolBar.addAction(self.actionZoomIn)
         self.toolBar.addAction(self.actionZoomOut)
         self.toolBar.addSeparator()
@@ -67,10 +83,14 @@ class Ui_MainWindow(object):
         self.toolBar.addAction(self.actionLineLine)
         self.toolBar.addAction(self.actionLinePoint)
         self.toolBar.addAction(self.actionPointPointLine)
+        self.toolBar.addAction(self.actionPointLinePointLine)
         self.toolBar.addAction(self.actionLinePointLine)
         self.toolBar.addSeparator()
         self.toolBar.addAction(self.actionValleyFold)
         self.toolBar.addAction(self.actionExecuteFold)
+        self.toolBar.addSeparator()
+        self.toolBar.addAction(self.actionUndo)
+        self.toolBar.addAction(self.actionRedo)
 
         self.retranslateUi(MainWindow)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
@@ -78,6 +98,12 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         MainWindow.setWindowTitle(QtGui.QApplication.translate("MainWindow", "MainWindow", None, QtGui.QApplication.UnicodeUTF8))
         self.toolBar.setWindowTitle(QtGui.QApplication.translate("MainWindow", "toolBar", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionOpen.setText(QtGui.QApplication.translate("MainWindow", "Open", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionOpen.setShortcut(QtGui.QApplication.translate("MainWindow", "Ctrl+O", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionSave.setText(QtGui.QApplication.translate("MainWindow", "Save", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionSave.setShortcut(QtGui.QApplication.translate("MainWindow", "Ctrl+S", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionExport.setText(QtGui.QApplication.translate("MainWindow", "Export", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionExport.setShortcut(QtGui.QApplication.translate("MainWindow", "Ctrl+E", None, QtGui.QApplication.UnicodeUTF8))
         self.actionZoomIn.setText(QtGui.QApplication.translate("MainWindow", "Zoom In", None, QtGui.QApplication.UnicodeUTF8))
         self.actionZoomOut.setText(QtGui.QApplication.translate("MainWindow", "Zoom Out", None, QtGui.QApplication.UnicodeUTF8))
         self.actionPoints.setText(QtGui.QApplication.translate("MainWindow", "Points", None, QtGui.QApplication.UnicodeUTF8))
@@ -86,7 +112,12 @@ class Ui_MainWindow(object):
         self.actionLinePoint.setText(QtGui.QApplication.translate("MainWindow", "Line Point", None, QtGui.QApplication.UnicodeUTF8))
         self.actionLinePointLine.setText(QtGui.QApplication.translate("MainWindow", "Line Point-Line", None, QtGui.QApplication.UnicodeUTF8))
         self.actionPointPointLine.setText(QtGui.QApplication.translate("MainWindow", "Point Point-Line", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionPointLinePointLine.setText(QtGui.QApplication.translate("MainWindow", "Point-Line Point-Line", None, QtGui.QApplication.UnicodeUTF8))
         self.actionValleyFold.setText(QtGui.QApplication.translate("MainWindow", "Valley Fold", None, QtGui.QApplication.UnicodeUTF8))
         self.actionValleyFold.setToolTip(QtGui.QApplication.translate("MainWindow", "Valley Fold", None, QtGui.QApplication.UnicodeUTF8))
         self.actionExecuteFold.setText(QtGui.QApplication.translate("MainWindow", "Execute Fold", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionUndo.setText(QtGui.QApplication.translate("MainWindow", "Undo", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionUndo.setShortcut(QtGui.QApplication.translate("MainWindow", "Ctrl+Z", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionRedo.setText(QtGui.QApplication.translate("MainWindow", "Redo", None, QtGui.QApplication.UnicodeUTF8))
+        self.actionRedo.setShortcut(QtGui.QApplication.translate("MainWindow", "Ctrl+Shift+Z", None, QtGui.QApplication.UnicodeUTF8))
 